@@ -1,229 +1,33 @@
 import streamlit as st
 import pandas as pd
-import google.generativeai as genai
 import io
-
-# ==============================================================================
-# DEFINITIVE PROMPT - The Engine of the Application
-# ==============================================================================
-# This is the complete, finalized prompt we engineered together.
-DEFINITIVE_PROMPT = """
-### PART 1: ROLE & GOAL
-
-You are an expert talent assessment consultant and a Subject Matter Expert (SME) in leadership development. You specialize in synthesizing quantitative competency scores into insightful, professional, and well-structured executive summaries for candidates. Your primary goal is to generate a personalized executive summary for a candidate based on their assessment scores. The summary must be constructive, evidence-based (tied to the scores), and adhere strictly to the provided interpretation guidelines and writing style.
-
-### PART 2: KNOWLEDGE BASE
-
-This is your rulebook. You will use the exact text from these tables based on the candidate's scores and their specified "Assessment Type".
-
-**Section 2.1: Initial Evaluations**
-
-**Overall Leadership Potential Interpretation**
-| Score Range | Tier | Interpretation Text |
-|---|---|---|
-| 3.50 - 5.00 | High | Demonstrates high potential with a strong capacity for growth and success in a more complex role. |
-| 2.50 - 3.49 | Moderate | Demonstrates moderate potential with a reasonable capacity for growth and success in a more complex role. |
-| 1.00 - 2.49 | Low | Demonstrates low potential with limited capacity for growth and success in a more complex role. |
-
-**Reasoning & Problem Solving Interpretation**
-| Score Range | Tier | Interpretation Text |
-|---|---|---|
-| 3.50 - 5.00 | High | His/Her reasoning and problem-solving ability is higher-than-average as compared to a group of peers, implying a solid foundation for analytical thinking and judgment. |
-| 2.50 - 3.49 | Moderate | His/Her reasoning and problem-solving ability is average, implying a reasonable level of logical thinking and problem solving aptitude. |
-| 1.00 - 2.49 | Low | His/Her reasoning and problem-solving ability is below-average as compared to a group of peers. |
-
-**Section 2.2: Core Competency Interpretations - For "APPLY" Assessment Type**
-
-**Drive Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently demonstrates high motivation and initiative to exceed expectations. A strong drive to achieve goals, targets, and results. Seeks fulfillment through impact. High focus on achieving outcomes against set targets and delivers consistent performance to exceed own goals. Shows perseverance and determination to achieve tasks and goals despite challenges. |
-| Moderate | 2.5 - 3.49 | Demonstrates motivation and takes initiative occasionally. Demonstrates a drive to achieve goals, but may need support. Interest in making an impact is present but not sustained. Moderate focus on outcomes and performance tracking; may occasionally lack focus. Shows perseverance to achieve tasks but may require support in overcoming setbacks or challenges. |
-| Low | 1.0 - 2.49 | Demonstrates limited motivation or initiative; may meet expectations but does not show a consistent drive to exceed them. Fulfillment from work or desire to make an impact is not clearly evident. Low focus on outcomes; may not track performance against goals consistently. There may be a lack of perseverance and problem-solving when faced with setbacks. |
-
-**Learning Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently takes time to focus on both personal and professional growth - for both self and others. Actively pursues continuous improvement and excellence; shows clear willingness to learn and unlearn. Strong ability to resolve problems with team members proactively and achieve common goals. Makes contributions on a continual basis, creates trust and teamwork. |
-| Moderate | 2.5 - 3.49 | Focuses on personal and professional growth and engages in learning activities but may not do so consistently. Moderate openness to learning and unlearning. Cooperates with team members in most situations but may need guidance to work through conflicts. Makes contributions intermittently and may not always address conflicts when they arise. |
-| Low | 1.0 - 2.49 | Rarely focuses on personal or professional growth. Engagement in learning is limited and may resist feedback or change. Seldom works collaboratively with team members. Rarely contributes meaningfully and may avoid resolving conflicts, often leaving issues unaddressed. |
-
-**People Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently shows capability to lead and inspire others. Displays strong empathy, understanding, and a focus on people. Builds relationships with ease and enjoys social interaction. Strong ability to identify and build relationships and connections. Understands stakeholder needs and mutual interests. Works to build long-term relationships. |
-| Moderate | 2.5 - 3.49 | Displays some ability to relate to and lead others. May show empathy and focus on people but not consistently. Builds relationships but may need support. May have only partial understanding of stakeholder needs and mutual interests. Works to build long-term relationships but may be inconsistent. |
-| Low | 1.0 - 2.49 | Demonstrtaes limited capability in leading or inspiring others. Social interaction may be minimal or strained. Struggles to build and maintain relationships. Demonstrates limited understanding of stakeholder needs or interdependencies, and does not work to build long-term relationships. |
-
-**Strategic Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Approaches work with a strong focus on the bigger picture. Operates independently with minimal guidance. Demonstrates a commercial and strategic mindset, regularly anticipating trends and their impact. Understands potential risks and seeks guidance to address the issues. Strong ability to revise strategies based on team needs while prioritising tasks accordingly in order to meet set deadlines. |
-| Moderate | 2.5 - 3.49 | Demonstrates awareness of the bigger picture but may need occasional guidance. Understands strategy in parts but may not consistently anticipate trends or broader implications. Can identify risks with some guidance and seeks input occasionally to address issues. Demonstrates some ability to revise plans but may need reminders to prioritise effectively. |
-| Low | 1.0 - 2.49 | Focus tends to be on immediate tasks. Requires frequent guidance. Displays limited awareness of trends or the strategic impact of work. Low ability to align goals with team direction and recognise potential risks. Requires frequent support to address issues and struggles to revise plans independently. |
-
-**Execution Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently addresses problems and challenges with confidence and resilience. Takes a diligent, practical, and solution-focused approach to solving issues. Will likely remain composed in the face of setbacks and approach problems with a positive “can do” attitude. |
-| Moderate | 2.5 - 3.49 | Demonstrates ability to address problems but may need support or time to build confidence and resilience. Attempts a practical approach but not always solution-focused. Moderate ability to identify issues proactively, and takes action when promoted. Sometimes may struggle to remain composed under pressure. |
-| Low | 1.0 - 2.49 | Struggles to address problems confidently. May rely heavily on others and may not take a practical or solution-oriented approach. Does not prioritise working with others to solve problems and identify solutions. Struggles to remain composed under pressure or maintain a positive approach. |
-
-**Change Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Thrives in change and complexity in the workplace. Manages new ways of working with adaptability, flexibility, and decisiveness during uncertainty. Supports implementation of new change initiatives and takes appropriate follow-up action. |
-| Moderate | 2.5 - 3.49 | Generally copes with change and can adapt when needed. May need support to remain flexible or decisive in uncertain situations. Operates with a degree of comfort when facts are not fully available and support change initiatives, but follow-up action may be delayed or inconsistent. |
-| Low | 1.0 - 2.49 | Struggles with change or uncertainty. May resist new ways of working and has difficulty adapting or deciding in changing circumstances. May be uncomfortable operating when facts are unclear and is unlikely to support change initiatives. |
-
-**Section 2.3: Core Competency Interpretations - For "SHAPE" Assessment Type**
-
-**Drive Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently demonstrates high motivation and initiative to exceed expectations. A strong drive to achieve goals, targets, and results. Seeks fulfillment through impact. Drives a high-performance culture across teams and demonstrates grit and persistence when working toward ambitious targets. |
-| Moderate | 2.5 - 3.49 | Demonstrates motivation and takes initiative occasionally. Demonstrates a drive to achieve goals, but may need support. Interest in making an impact is present but not sustained. Moderate ability to articulate performance standards that contribute to achieving organisational goals. Occasionally supports performance across teams and shows persistence when working towards goals. |
-| Low | 1.0 - 2.49 | Demonstrates limited motivation or initiative; may meet expectations but does not show a consistent drive to exceed them. Fulfillment from work or desire to make an impact is not clearly evident. Low ability to articulate performance standards that support organisational goals. Needs development in fostering a high-performance culture and in maintaining persistence when faced with challenging goals. |
-
-**Learning Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently takes time to focus on both personal and professional growth - for both self and others. Actively pursues continuous improvement and excellence; shows clear willingness to learn and unlearn. Strongly supports development of others by identifying and leveraging individual strengths. Advocates for learning and career growth, contributing to a culture of learning and continuous improvement. |
-| Moderate | 2.5 - 3.49 | Focuses on personal and professional growth for self and others and engages in learning activities but may not do so consistently. Displays willingness to learn and unlearn. Recognizes others’ development needs and offers support, though may not consistently nurture growth or advocate for talent advancement. |
-| Low | 1.0 - 2.49 | Rarely focuses on personal or professional growth- for both self and others. Engagement in learning is limited and may resist feedback or change. Shows minimal interest in developing others or contributing to a learning environment. May neglect or avoid growth conversations. |
-
-**People Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently shows capability to lead and inspire others. Displays strong empathy, understanding, and a focus on people. Builds relationships with ease and enjoys social interaction. Demonstrates strong ability to engage key stakeholders, build trust-based relationships, and find synergies for mutual outcomes. Proactively networks and stays connected across internal and external touchpoints |
-| Moderate | 2.5 - 3.49 | Displays some ability to lead and inspire others. May show empathy and focus on people inconsistently. Moderate ability to maintain and build relationships with key stakeholders. Often identifies synergies for positive outcomes. Occasionally proactively networks. |
-| Low | 1.0 - 2.49 | Demonstrates limited capability in leading or inspiring others. Social interaction may be minimal or strained. Struggles to build and maintain relationships. Rarely engages with stakeholders and does not leverage relationships for mutual outcomes. Limited presence in networks or cross-functional collaboration. |
-
-**Strategic Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Approaches work with a strong focus on the bigger picture. Operates independently with minimal guidance. Demonstrates a commercial and strategic mindset, regularly anticipating trends and their impact. Effectively balances short-term goals with long-term organizational value. Translates complex goals into clear team actions and helps others understand broader implications. |
-| Moderate | 2.5 - 3.49 | Demonstrates some awareness of the bigger picture but may need occasional guidance. Understands strategy in parts but may not consistently anticipate trends or broader implications. Occasionally translates organisational goals into meaningful actions. Can focus on both immediate and longer-term needs but may favor one over the other. |
-| Low | 1.0 - 2.49 | Focus tends to be on immediate tasks. Requires frequent guidance. Displays limited awareness of trends or the strategic impact of work. Needs ongoing guidance to connect work with strategic direction. Struggles to translate organizational priorities into meaningful tasks or influence direction. |
-
-**Execution Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Consistently addresses problems and challenges with confidence and resilience. Takes a diligent, practical, and solution-focused approach. Comfortable navigating ambiguity and complexity. Makes sound decisions under pressure and thrives in environments with multiple demands. |
-| Moderate | 2.5 - 3.49 | Has the ability to address problems but may need time or support to build confidence and resilience. Attempts a practical approach but not always solution-focused. Moderate ability to handle ambiguity and complex envrionments. Shows some confidence in leading through uncertain environments |
-| Low | 1.0 - 2.49 | Struggles to address problems confidently. May rely heavily on others. Practical or solution-oriented approaches are limited. Avoids complexity and ambiguity. Rarely takes initiative in resolving obstacles. |
-
-**Change Potential**
-| Tier | Score Range | Interpretation Text |
-|---|---|---|
-| High | 3.5 - 5.00 | Thrives in change and complexity. Manages new ways of working with adaptability, flexibility, and decisiveness during change. Plays an active role in transformation initiatives, shows strong resilience, and enables buy-in and alignment from others during change. |
-| Moderate | 2.5 - 3.49 | Demonstrates ability to cope with change and can adapt when needed. May need support to remain flexible or decisive in uncertain situations. Contributes to organisational change initiatives, may enable buy-in and shows resilience during challenging times. |
-| Low | 1.0 - 2.49 | Struggles with change or uncertainty. May resist new ways of working and has difficulty adapting or deciding in changing circumstances. Rarely contributes to transformation efforts and finds it difficult to stay resilient under shifting demands. Has difficulty enabling buy-in and support. |
-
-
-### PART 3: WRITING GUIDELINES & CONSTRAINTS (REVISED & FINAL)
-
-**3.1. The Golden Rule: Verbatim Interpretation for Paragraph**
-When writing the main summary paragraph, you must use the **exact and untrimmed** interpretation text from the Knowledge Base. Your function is to intelligently sequence these pre-approved blocks of text into a coherent paragraph.
-
-**3.2. Summary Structure**
-1.  **Opening Statement:** Begin with the Overall Leadership Potential interpretation text based on its score.
-2.  **Reasoning Ability:** Follow immediately with the Reasoning & Problem Solving interpretation text based on its score.
-3.  **Competency Description (Main Body):** Weave the interpretation texts for each of the six core competencies into a natural-flowing paragraph. Do NOT name the competencies.
-4.  **Bullet Points:** Below the paragraph, provide a section with exactly two strengths and two development areas.
-
-**3.3. Bullet Point Generation: Core Rules**
-
-**A. CRUCIAL RULE: AVOID REPETITION**
-The sentences and phrases used in the 'Strengths' and 'Development Areas' bullet points **MUST NOT** be the same as those used in the main summary paragraph. To achieve this, you must select *different sentences or phrases* from the relevant competency's interpretation text. The bullet points must provide **additional detail**, not repeat what has already been said.
-
-**B. BULLET POINT FRAMING AND PHRASING**
-You must **summarize, combine, and rephrase** the interpretation text for the bullet points to be concise and insightful.
-* For **Strengths:** Combine related ideas to form a comprehensive point. Prioritize the **most positive and confident phrasing available** and actively avoid weak qualifiers (e.g., 'occasionally', 'generally', 'sometimes') if more assertive alternatives exist within the same interpretation block.
-* For **Development Areas:** Transform the descriptive text into a concise, **constructive, and forward-looking recommendation.** Frame it as an actionable goal (e.g., "Develop capability in X," "Could focus on Y," or "May benefit from Z").
-
-**3.4. Logic for Selecting Strengths & Development Points**
-- High: 3.5 - 5.00, Moderate: 2.5 - 3.49, Low: 1.0 - 2.49.
-- Select the two highest-scoring competencies as strengths and the two lowest-scoring as development areas.
-- **Handling Tied Scores:** If multiple competencies are tied for the highest or lowest score, your selection priority is to choose the competencies that allow you to create the most **insightful and non-repetitive** bullet points, following Rule 3.3.A.
-
-**3.5. Tone, Style, and Prohibitions**
-- **Style:** Third person, present tense, American English. Neutral, professional, objective, constructive tone. Vary sentence openers. The main paragraph must be under 200 words.
-- **Forbidden Topics:** Do NOT mention AI, assessments, tools, scores, or numbers. Do NOT name the competencies. Do NOT compare candidates to others (with the specific exception of the "Reasoning & Problem Solving" text).
-
-### PART 4: STEP-BY-STEP TASK (REVISED & FINAL)
-1.  Receive the candidate's data.
-2.  Select the correct Knowledge Base (`Apply` or `Shape`).
-3.  Draft the opening statements and the main summary paragraph using verbatim text from the Knowledge Base.
-4.  Mentally note which sentences from the interpretation matrices were used in the paragraph.
-5.  Identify the two highest and two lowest core competency scores.
-6.  For the two strengths, review the interpretation text for the highest-scoring competencies. Select **different sentences or phrases** that were NOT used in the paragraph. Combine and rephrase them into positive, confident bullet points as per Rule 3.3.B.
-7.  For the two development areas, review the interpretation text for the lowest-scoring competencies. Select **different sentences or phrases** that were NOT used in the paragraph. Rephrase them into forward-looking, actionable recommendations as per Rule 3.3.B.
-8.  Assemble the final output.
-
-### PART 5: FEW-SHOT EXAMPLES (GOLD STANDARD MODELS)
-
-**Example 1: Apply - High Scores**
-**INPUT:**
-`{ "name": "Sub 1", "pronoun": "She/Her", "assessment_type": "Apply", "scores": { "Overall Leadership": 4, "Reasoning & Problem Solving": 4, "Drive Potential": 4, "Learning Potential": 3, "People Potential": 4, "Strategic Potential": 4, "Execution Potential": 5, "Change Potential": 4 } }`
-**OUTPUT:**
-Sub 1 demonstrates high potential with a strong capacity for growth and success in a more complex role. Her reasoning and problem-solving ability is higher-than-average as compared to a group of peers, implying a solid foundation for analytical thinking and judgment.
-She consistently demonstrates high motivation and initiative to exceed expectations with a strong drive to achieve goals, targets, and results. She also shows a strong capability to lead and inspire others, building relationships with ease and understanding stakeholder needs. Furthermore, she approaches work with a strong focus on the bigger picture, operating independently with minimal guidance. She thrives in change and complexity, managing new ways of working with adaptability, and consistently addresses problems with confidence and resilience. While she focuses on personal and professional growth and engages in learning activities, she may not do so consistently and may need guidance to work through conflicts.
-**Strengths:**
-* Consistently addresses problems and challenges with confidence and resilience.
-* Takes a diligent, practical, and solution-focused approach to solving issues.
-**Development Areas:**
-* Develop an openness to learning and unlearning
-* May not always address conflicts when they arise and makes contributions intermittently.
-
-**Example 2: Apply - Low Scores**
-**INPUT:**
-`{ "name": "John Doe", "pronoun": "He/His", "assessment_type": "Apply", "scores": { "Overall Leadership": 3, "Reasoning & Problem Solving": 3, "Drive Potential": 2, "Learning Potential": 2, "People Potential": 3, "Strategic Potential": 3, "Execution Potential": 3, "Change Potential": 3 } }`
-**OUTPUT:**
-John Doe demonstrates moderate potential with a reasonable capacity for growth and success in a more complex role. His reasoning and problem-solving ability is average, implying a reasonable level of logical thinking and problem solving aptitude.
-He demonstrates limited motivation and initiative, often meeting expectations but not showing a consistent drive to exceed them. He occasionally engages in learning activties, makes contributions intermittently and may resist feedback.
-He displays moderate ability to lead others and may need support in building relationships. While he demonstrates strategic awareness, he may need occasional guidance to translate organisational goals for team action.
-He demonstrates the ability to address problems but may need support to build confidence and resilience. Finally, he generally copes well with change, with a moderate ability to contribute to organisational change and transformation.
-**Strengths:**
-* Demonstrates ability to lead and inspire others
-* Can identify risks and address issues with support and guidance.
-**Development Areas:**
-* May lack motivation, initiative and focus
-* Low openness to learning and may resist feedback
-
-**Example 3: Shape - Mixed/Moderate Scores**
-**INPUT:**
-`{ "name": "Ayesha Obaid Al Mheiri", "pronoun": "She/Her", "assessment_type": "Shape", "scores": { "Overall Leadership": 2.97, "Reasoning & Problem Solving": 3, "Drive Potential": 2.97, "Learning Potential": 3.15, "People Potential": 2.92, "Strategic Potential": 3.38, "Execution Potential": 3.9, "Change Potential": 2.895 } }`
-**OUTPUT:**
-Ayesha Obaid Al Mheiri demonstrates moderate potential with a reasonable capacity for growth and success in a more complex role. Her reasoning and problem-solving ability is average, implying a reasonable level of logical thinking and problem solving aptitude.
-She demonstrates motivation and takes initiative occasionally, and has a moderate ability to articulate performance standards that contribute to achieving organisational goals. She focuses on personal and professional growth for self and others, but may not do so consistently. She displays some ability to lead and inspire others, with a moderate ability to maintain and build relationships with key stakeholders. Strategically, she demonstrates some awareness of the bigger picture but may need occasional guidance. She consistently addresses problems and challenges with confidence and resilience, takes a diligent, practical, and solution-focused approach, and is comfortable navigating ambiguity and complexity. She also demonstrates the ability to cope with change and can adapt when needed, though may need support to remain decisive in uncertain situations.
-**Strengths:**
-* Consistently addresses problems and challenges with confidence and resilience.
-* Ability to translate organisational goals into action and focus on short and long term needs.
-**Development Areas:**
-* May need support to remain flexible or decisive in uncertain situations.
-* Develop capability to lead and inspire others with stronger empathy and higher focus on people
-
-**Example 4: Apply - Mixed/Low Scores**
-**INPUT:**
-`{ "name": "Ali Salem Al Suwaidi", "pronoun": "He/His", "assessment_type": "Apply", "scores": { "Overall Leadership": 2.55, "Reasoning & Problem Solving": 3, "Drive Potential": 2.22, "Learning Potential": 2.55, "People Potential": 2.36, "Strategic Potential": 2.475, "Execution Potential": 1.43, "Change Potential": 2.75 } }`
-**OUTPUT:**
-Ali Salem Al Suwaidi demonstrates moderate potential with a reasonable capacity for growth and success in a more complex role. His reasoning and problem-solving ability is average, implying a reasonable level of logical thinking and problem solving aptitude.
-He demonstrates limited motivation or initiative, and may meet expectations but does not show a consistent drive to exceed them. Fulfillment from work or a desire to make an impact is not clearly evident. He focuses on personal and professional growth and engages in learning activities but may not do so consistently, and may need guidance to work through conflicts. He demonstrates limited capability in leading or inspiring others, as social interaction may be strained and he struggles to build relationships. His focus tends to be on immediate tasks and he requires frequent guidance. He struggles to address problems confidently, may rely heavily on others, and may not take a practical or solution-oriented approach. However, he generally copes with change and can adapt when needed, but may need support to remain flexible in uncertain situations.
-**Strengths:**
-* Supports change initiatives and demonstartes the ability to operate with comfort during uncertainity
-* Focuses on personal and professional growth and engages in learning activities, though this may be inconsistent.
-**Development Areas:**
-* Develop independent problem-solving skills and confidence in decision-making.
-* Demonstrates limited motivation or initiative and may lack perseverance when faced with setbacks.
-
-"""
-
+import json
+import threading
+
+from batch import DEFAULT_MAX_RETRIES, DEFAULT_MAX_WORKERS, DEFAULT_RPM, DEFAULT_TPM
+from gemini_client import GeminiSession
+from journal import JobJournal, export_partial, file_digest, job_id_for
+from knowledge_base import PROMPT_VERSION
+from packing import DEFAULT_PACK_SIZE, MAX_PACK_SIZE
+from pipeline import (
+    REQUIRED_COLUMNS,
+    FIRST_TOKEN_COLUMN,
+    SUMMARY_COLUMN,
+    VALIDATION_COLUMN,
+    GenerationOptions,
+    generate_summaries,
+    missing_columns,
+)
+from preprocess import prepare_candidates
+from result_cache import ResultCache
+from task_queue import TaskQueue, export_job, queue_job_id
+from telemetry import TELEMETRY_COLUMNS, RunMetrics
 
 # ==============================================================================
 # HELPER FUNCTIONS
 # ==============================================================================
 
+@st.cache_data
 def create_sample_excel():
     """Creates an in-memory Excel file for users to download as a template."""
     
@@ -253,31 +57,53 @@ def create_sample_excel():
     return output.getvalue()
 
 
-def generate_summary_for_candidate(api_key, candidate_data):
-    """
-    Generates a single executive summary by calling the Gemini API.
+@st.cache_data(show_spinner=False)
+def load_upload(data):
+    """Parses uploaded workbook bytes once; reruns with the same upload reuse the DataFrame."""
+    return pd.read_excel(io.BytesIO(data))
 
-    Args:
-        api_key (str): The Google API key.
-        candidate_data (str): The formatted string containing the candidate's input.
 
-    Returns:
-        str: The AI-generated executive summary or an error message.
-    """
-    try:
-        genai.configure(api_key=api_key)
-        
-        # Construct the full prompt: Definitive Prompt + Candidate-specific Input
-        full_prompt = DEFINITIVE_PROMPT + "\n\n" + candidate_data
-
-        # Call the Gemini 2.5 Pro model
-        model = genai.GenerativeModel('gemini-2.5-pro')
-        response = model.generate_content(full_prompt)
-        
-        return response.text
-    except Exception as e:
-        st.error(f"An error occurred while calling the Gemini API: {e}")
-        return f"Error: Could not generate summary. Details: {e}"
+def results_to_excel(df):
+    """Serializes the results DataFrame to .xlsx bytes for the download button."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Results')
+    return output.getvalue()
+
+
+@st.fragment(run_every=2)
+def show_queued_job(queue, job_id, extra_columns):
+    """Polls a queued job's progress and offers the results workbook once every row has finished."""
+    progress = queue.progress(job_id)
+    finished = progress['done'] + progress['failed'] + progress['rejected']
+    st.progress(finished / progress['total'] if progress['total'] else 0.0)
+    st.text(
+        f"Job {job_id}: {progress['done']} done, {progress['running']} running, {progress['pending']} queued, "
+        f"{progress['failed']} failed, {progress['rejected']} rejected."
+    )
+    if not queue.is_finished(job_id):
+        return
+
+    export_key = f"queue_export_{job_id}"
+    if progress['failed']:
+        st.warning(f"{progress['failed']} rows failed. Their errors are in the results workbook.")
+        if st.button("Retry failed rows"):
+            queue.retry_failed(job_id)
+            st.session_state.pop(export_key, None)
+            return
+    else:
+        st.success("All summaries have been generated!")
+    # Assemble the workbook once; the fragment keeps polling in case failed rows are retried
+    if export_key not in st.session_state:
+        output = io.BytesIO()
+        export_job(queue, job_id, output, SUMMARY_COLUMN, extra_columns)
+        st.session_state[export_key] = output.getvalue()
+    st.download_button(
+        label="Download Results as Excel File",
+        data=st.session_state[export_key],
+        file_name="executive_summary_results.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
 
 # ==============================================================================
@@ -294,7 +120,7 @@ This application uses the Gemini 2.5 Pro model to generate executive summaries f
 1.  Enter your Google API key below. Your key is not stored.
 2.  Download the sample Excel template to see the required format.
 3.  Upload your completed Excel file containing candidate data.
-4.  Once processed, a download link for the results will appear.
+4.  Click **Generate Summaries**. Once processed, a download link for the results will appear.
 """)
 
 # --- Sidebar for API Key and Sample File Download ---
@@ -302,6 +128,97 @@ with st.sidebar:
     st.header("Configuration")
     api_key = st.text_input("Enter your Google API Key", type="password")
 
+    st.header("Prompt")
+    slim_prompt = st.toggle(
+        "Send candidate-specific prompt", value=True,
+        help="Send only the knowledge-base rows and examples relevant to each candidate "
+             "instead of the full rulebook. Cuts input tokens and time-to-first-token."
+    )
+    max_examples = st.slider(
+        "Few-shot examples per candidate", min_value=1, max_value=4, value=2, disabled=not slim_prompt
+    )
+    use_context_cache = st.toggle(
+        "Cache static prompt on the server", value=True,
+        help="Register the shared part of the prompt as Gemini cached content once per run, "
+             "so each request only sends the candidate-specific part. Only the full prompt is large "
+             "enough to cache on Gemini 2.5 Pro; the candidate-specific prompt's shared rules are "
+             "below the 4,096-token minimum and are always sent inline."
+    )
+
+    packed_mode = st.toggle(
+        "Pack several candidates per request", value=False,
+        help="Send several candidates in one request and ask for structured JSON output. "
+             "Candidates missing or malformed in the response are regenerated one at a time."
+    )
+    pack_size = st.slider(
+        "Candidates per request", min_value=2, max_value=MAX_PACK_SIZE, value=DEFAULT_PACK_SIZE,
+        disabled=not packed_mode,
+        help="Larger packs save more static-prompt tokens but each request takes longer."
+    )
+    dedup_profiles = st.toggle(
+        "Share summaries across identical profiles", value=False,
+        help="Candidates with the same assessment type, score tiers and top/bottom competencies get one "
+             "generation, personalized locally with each name and pronoun. On the worker queue, only "
+             "candidates claimed in the same batch share a generation."
+    )
+
+    st.header("Validation")
+    validate_output = st.toggle(
+        "Check summaries against the writing rules", value=True,
+        help="Validate each summary locally (verbatim text, length, bullet counts, no numbers or "
+             "competency names, no repetition) and regenerate only the ones that fail."
+    )
+    max_regenerations = st.number_input(
+        "Regeneration attempts per failing summary", min_value=0, max_value=5, value=2,
+        disabled=not validate_output
+    )
+
+    st.header("Result Cache")
+    use_result_cache = st.toggle(
+        "Reuse previously generated summaries", value=True,
+        help="Candidates whose inputs, prompt version and settings are unchanged are served "
+             "from the local cache instead of calling the API again, and interrupted runs of the "
+             "same workbook resume where they stopped."
+    )
+    st.caption(f"Prompt version: {PROMPT_VERSION}")
+    if st.button("Clear result cache"):
+        removed = ResultCache().invalidate()
+        cleared_jobs = JobJournal().clear()
+        st.success(f"Removed {removed} cached summaries and {cleared_jobs} saved jobs.")
+
+    with st.expander("Throughput settings"):
+        max_workers = st.number_input(
+            "Concurrent requests", min_value=1, max_value=64, value=DEFAULT_MAX_WORKERS,
+            help="Maximum number of Gemini calls in flight at once."
+        )
+        rpm_limit = st.number_input(
+            "Requests per minute", min_value=0, value=DEFAULT_RPM,
+            help="Request budget for your API tier. 0 disables the limit."
+        )
+        tpm_limit = st.number_input(
+            "Tokens per minute", min_value=0, value=DEFAULT_TPM, step=100_000,
+            help="Input-token budget for your API tier. 0 disables the limit."
+        )
+        max_retries = st.number_input(
+            "Retries per candidate", min_value=0, max_value=10, value=DEFAULT_MAX_RETRIES,
+            help="Retries for rate-limit (429) and server (5xx) errors, with jittered backoff."
+        )
+        stream_output = st.toggle(
+            "Stream responses live", value=True,
+            help="Show each candidate's summary as it is written and record time to first token."
+        )
+        telemetry_columns = st.toggle(
+            "Add telemetry columns", value=False,
+            help="Add per-candidate generation time, API attempts, token counts and estimated cost to the results."
+        )
+
+    st.header("Execution")
+    use_queue = st.toggle(
+        "Run on the worker queue", value=False,
+        help="Submit the workbook as a job to the queue on this machine instead of generating in this session. "
+             "Start workers on the same machine with `python worker.py`; they need their own API key."
+    )
+
     st.header("Template")
     st.download_button(
         label="Download Sample Excel Template",
@@ -317,65 +234,238 @@ uploaded_file = st.file_uploader(
 )
 
 if uploaded_file is not None:
-    if not api_key:
-        st.warning("Please enter your Google API key in the sidebar to proceed.")
-    else:
-        try:
-            # Read the uploaded data
-            df = pd.read_excel(uploaded_file)
-            st.success("File uploaded successfully. Processing candidates...")
-
-            # Check for required columns
-            required_columns = [
-                'Name', 'Gender', 'Type', 'Overall Leadership', 
-                'Reasoning & Problem Solving', 'Drive Potential', 'Learning Potential',
-                'People Potential', 'Strategic Potential', 'Execution Potential', 'Change Potential'
-            ]
-            if not all(col in df.columns for col in required_columns):
-                 st.error(f"The uploaded file is missing one or more required columns. Please check the sample template. Required columns are: {', '.join(required_columns)}")
+    try:
+        # Read the uploaded data (parsed once per distinct upload)
+        upload_bytes = uploaded_file.getvalue()
+        df = load_upload(upload_bytes)
+
+        # Check for required columns
+        if missing_columns(df.columns):
+             st.error(f"The uploaded file is missing one or more required columns. Please check the sample template. Required columns are: {', '.join(REQUIRED_COLUMNS)}")
+        else:
+            # Validate and score every row up front, before anything is sent to the API
+            prepared = prepare_candidates(df)
+            ready = len(prepared.accepted)
+            st.success(f"File uploaded successfully. {ready} of {len(df)} candidates ready to process.")
+            if not prepared.issues.empty:
+                if prepared.rejections:
+                    st.warning(
+                        f"{len(prepared.rejections)} rows have invalid data and will be skipped. "
+                        f"Fix them in the workbook and upload it again to include them."
+                    )
+                if prepared.flagged:
+                    st.info(f"{prepared.flagged} values were flagged but the rows will still be processed.")
+                with st.expander("Data issues", expanded=bool(prepared.rejections)):
+                    st.dataframe(prepared.issues, hide_index=True)
+            options = GenerationOptions(
+                slim=slim_prompt,
+                max_examples=max_examples,
+                packed=packed_mode,
+                pack_size=pack_size,
+                max_workers=max_workers,
+                rpm=rpm_limit,
+                tpm=tpm_limit,
+                max_retries=max_retries,
+                use_context_cache=use_context_cache,
+                validate=validate_output,
+                max_regenerations=max_regenerations,
+                stream=stream_output,
+                dedup=dedup_profiles,
+                use_result_cache=use_result_cache,
+            )
+            journal = JobJournal()
+            digest = file_digest(upload_bytes)
+            job_id = job_id_for(digest, options)
+            last_run = st.session_state.get('last_run')
+            has_results = last_run is not None and last_run['job_id'] == job_id
+
+            # A previous, interrupted run of this job can be resumed or partially downloaded
+            previous = journal.progress(job_id)
+            if not use_queue and use_result_cache and not has_results and previous['done']:
+                st.info(
+                    f"Resuming job {job_id}: {previous['done']} of {previous['total']} summaries were "
+                    f"already generated; only the remaining rows will be processed."
+                )
+                partial_output = io.BytesIO()
+                export_partial(journal, job_id, partial_output, SUMMARY_COLUMN)
+                st.download_button(
+                    label="Download Partial Results",
+                    data=partial_output.getvalue(),
+                    file_name="executive_summary_partial_results.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+            run_clicked = False
+            if use_queue:
+                # Workers generate the job; this session only submits it and polls progress
+                queue = TaskQueue()
+                queued_job_id = queue_job_id(digest, options)
+                if st.button("Submit Job to Worker Queue", type="primary", disabled=not ready):
+                    if not queue.submit(queued_job_id, options, df.columns, df.to_dict('records'),
+                                        prepared.candidates, prepared.rejections, source=uploaded_file.name):
+                        st.info(f"Job {queued_job_id} is already queued with these settings; showing its progress.")
+                if queue.progress(queued_job_id)['total']:
+                    show_queued_job(
+                        queue, queued_job_id,
+                        ([VALIDATION_COLUMN] if options.validate else [])
+                        + ([FIRST_TOKEN_COLUMN] if options.stream else [])
+                        + (TELEMETRY_COLUMNS if telemetry_columns else []),
+                    )
             else:
-                summaries = []
+                if not api_key:
+                    st.warning("Please enter your Google API key in the sidebar to proceed.")
+                # Generation only happens on an explicit click; other reruns reuse `last_run`
+                run_clicked = st.button("Generate Summaries", type="primary", disabled=not api_key or not ready)
+
+            if run_clicked:
                 progress_bar = st.progress(0)
+                status = st.empty()
                 total_rows = len(df)
-
-                # Process each row in the DataFrame
-                for i, row in df.iterrows():
-                    # Map Gender to Pronoun for the prompt
-                    pronoun = "She/Her" if str(row['Gender']).upper() == 'F' else "He/His"
-                    
-                    # Construct the candidate-specific input string for the prompt
-                    candidate_input = f"""
-**Final Example to Process**
-**INPUT:**
-`{{ "name": "{row['Name']}", "pronoun": "{pronoun}", "assessment_type": "{row['Type']}", "scores": {{ "Overall Leadership": {row['Overall Leadership']}, "Reasoning & Problem Solving": {row['Reasoning & Problem Solving']}, "Drive Potential": {row['Drive Potential']}, "Learning Potential": {row['Learning Potential']}, "People Potential": {row['People Potential']}, "Strategic Potential": {row['Strategic Potential']}, "Execution Potential": {row['Execution Potential']}, "Change Potential": {row['Change Potential']} }} }}`
-"""
-                    st.text(f"Generating summary for {row['Name']}...")
-                    summary = generate_summary_for_candidate(api_key, candidate_input)
-                    summaries.append(summary)
-                    
-                    # Update progress bar
-                    progress_bar.progress((i + 1) / total_rows)
+                names = df['Name'].tolist()
+                candidates = prepared.candidates
+
+                # Every summary is journaled as it arrives, so an interrupted run resumes here
+                if journal.start_job(job_id, list(df.columns), source=uploaded_file.name):
+                    journal.add_rows(job_id, df.to_dict('records'))
+
+                result_cache = None
+                if options.use_result_cache:
+                    result_cache = ResultCache()
+                    result_cache.invalidate_stale()
+                    result_cache.evict()
+
+                progress = {'done': 0}
+                live_output = st.empty()
+                results_table = st.empty()
+                # Written by worker threads as tokens stream in; rendered on the script thread
+                streaming = {}
+                streaming_lock = threading.Lock()
+                completed = {}
+
+                def on_text(index, text):
+                    with streaming_lock:
+                        streaming[index] = text
+
+                def on_summary(index, summary):
+                    # Runs on the script thread, so Streamlit calls are safe here
+                    progress['done'] += 1
+                    progress_bar.progress(progress['done'] / total_rows)
+                    status.text(f"Generated summary for {names[index]} ({progress['done']}/{total_rows})")
+                    with streaming_lock:
+                        streaming.pop(index, None)
+                    completed[index] = summary
+
+                def on_tick():
+                    with streaming_lock:
+                        in_flight = sorted(streaming.items())
+                    if in_flight:
+                        live_output.markdown("\n\n---\n\n".join(f"**{names[i]}** (writing...)\n\n{text}" for i, text in in_flight))
+                    else:
+                        live_output.empty()
+                    if completed:
+                        rows = sorted(completed)
+                        results_table.dataframe(
+                            df.iloc[rows].assign(**{SUMMARY_COLUMN: [completed[i] for i in rows]})
+                        )
+
+                metrics = RunMetrics(options)
+                with GeminiSession(api_key, model_name=options.model_name, use_context_cache=options.use_context_cache) as session:
+                    result = generate_summaries(
+                        candidates, session, options, result_cache=result_cache, on_summary=on_summary,
+                        journal=journal, job_id=job_id, on_text=on_text, on_tick=on_tick,
+                        rejected=prepared.rejections, resume=use_result_cache,
+                    )
+                live_output.empty()
+                results_table.empty()
+                metrics.add(result)
 
                 # Add the generated summaries as a new column
-                df['AI Executive Summary'] = summaries
-                st.success("All summaries have been generated!")
-                
-                # Display results on screen
-                st.dataframe(df)
+                df[SUMMARY_COLUMN] = result.summaries
+                if options.validate:
+                    df[VALIDATION_COLUMN] = result.validation_column()
+                if options.stream:
+                    df[FIRST_TOKEN_COLUMN] = result.first_token_column()
+                if telemetry_columns:
+                    for column, values in result.telemetry_columns(options.model_name).items():
+                        df[column] = values
+                last_run = {
+                    'job_id': job_id,
+                    'df': df,
+                    'excel': results_to_excel(df),
+                    'errors': {names[index]: str(error) for index, error in result.errors.items()},
+                    'rejected': len(result.rejected),
+                    'cache': (result_cache.hits, result_cache.misses) if result_cache is not None else None,
+                    'validation': (
+                        sum(1 for reasons in result.validation if reasons), result.regenerated
+                    ) if options.validate else None,
+                    'metrics': metrics.summary(),
+                }
+                st.session_state['last_run'] = last_run
+                has_results = True
+
+            if has_results and not use_queue:
+                total_rows = len(last_run['df'])
+                failures = last_run['errors']
+                for name, error in failures.items():
+                    st.error(f"An error occurred while calling the Gemini API for {name}: {error}")
+                if last_run['cache'] is not None:
+                    hits, misses = last_run['cache']
+                    st.info(f"Result cache: {hits} hits, {misses} misses.")
+                run_metrics = last_run['metrics']
+                if run_metrics['dedup_groups']:
+                    st.info(
+                        f"Deduplication: {run_metrics['deduplicated']} candidates shared {run_metrics['dedup_groups']} "
+                        f"generations ({run_metrics['dedup_ratio']:.1f} candidates per API call)."
+                    )
+                if last_run['validation'] is not None:
+                    failing, regenerated = last_run['validation']
+                    if failing:
+                        st.warning(f"Validation: {failing} summaries still break the writing rules after {regenerated} regenerations. See the '{VALIDATION_COLUMN}' column.")
+                    else:
+                        st.info(f"Validation: all summaries pass the writing rules ({regenerated} regenerations).")
+                if failures or last_run['rejected']:
+                    generated = total_rows - len(failures) - last_run['rejected']
+                    st.warning(f"Generated {generated} of {total_rows} summaries ({last_run['rejected']} rows rejected).")
+                else:
+                    st.success("All summaries have been generated!")
+
+                # Run summary
+                st.subheader("Run Summary")
+                time_col, latency_col, token_col, cost_col = st.columns(4)
+                time_col.metric("Run time", f"{run_metrics['seconds']:.1f}s")
+                latency_col.metric(
+                    "p95 time per candidate",
+                    f"{run_metrics['latency_p95']:.1f}s" if run_metrics['latency_p95'] is not None else "-"
+                )
+                token_col.metric(
+                    "Tokens (prompt / output)", f"{run_metrics['prompt_tokens']:,} / {run_metrics['output_tokens']:,}"
+                )
+                cost_col.metric(
+                    "Estimated cost",
+                    f"${run_metrics['estimated_cost_usd']:.4f}" if run_metrics['estimated_cost_usd'] is not None else "-"
+                )
+                st.caption(
+                    f"{run_metrics['calls']} API calls, {run_metrics['failed_attempts']} failed attempts, "
+                    f"{run_metrics['cached_tokens']:,} prompt tokens served from the context cache. "
+                    f"Prompt version {run_metrics['prompt_version']}."
+                )
 
-                # Convert final DataFrame to Excel for download
-                final_output = io.BytesIO()
-                with pd.ExcelWriter(final_output, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Results')
-                final_output.seek(0)
+                # Display results on screen
+                st.dataframe(last_run['df'])
 
                 # Provide download button for the final results
                 st.download_button(
                     label="Download Results as Excel File",
-                    data=final_output.getvalue(),
+                    data=last_run['excel'],
                     file_name="executive_summary_results.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
+                st.download_button(
+                    label="Download Run Metrics (JSON)",
+                    data=json.dumps(run_metrics, indent=2),
+                    file_name="run_metrics.json",
+                    mime="application/json"
+                )
 
-        except Exception as e:
-            st.error(f"An error occurred while processing the file: {e}")
+    except Exception as e:
+        st.error(f"An error occurred while processing the file: {e}")
@@ -0,0 +1,215 @@
+"""
+Concurrent, rate-limit-aware batch execution for Gemini generation calls.
+
+The Streamlit app (and any other front end) hands this module a list of work
+items and a function that processes one item. Items are run on a thread pool
+with a configurable number of in-flight requests, throttled to
+requests-per-minute and tokens-per-minute budgets, and retried with jittered
+exponential backoff when the API answers with a 429 or a 5xx. Results always
+come back in the original item order.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+# HTTP status codes that are worth retrying: rate limiting and server-side faults.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Default throughput settings, sized for a paid-tier Gemini 2.5 Pro key.
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RPM = 150
+DEFAULT_TPM = 2_000_000
+DEFAULT_MAX_RETRIES = 5
+
+
+# ==============================================================================
+# RATE LIMITING
+# ==============================================================================
+
+class RateLimiter:
+    """
+    Sliding-window limiter for requests-per-minute and tokens-per-minute budgets.
+
+    Every call to `acquire` records one request and its estimated token cost.
+    When admitting the request would exceed either budget within the window,
+    the caller sleeps until enough of the window has expired. A budget of
+    None (or 0) disables that limit.
+    """
+
+    def __init__(self, rpm=None, tpm=None, window=60.0, clock=time.monotonic, sleep=time.sleep):
+        self.rpm = rpm or None
+        self.tpm = tpm or None
+        self.window = window
+        self._clock = clock
+        self._sleep = sleep
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._events and now - self._events[0][0] >= self.window:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now, tokens):
+        """Returns 0 if a request of `tokens` can be admitted now, otherwise seconds to wait."""
+        if self.rpm and len(self._events) >= self.rpm:
+            return self._events[0][0] + self.window - now
+        if self.tpm and self._events and self._tokens_in_window + tokens > self.tpm:
+            if tokens > self.tpm:
+                # A single request larger than the whole budget can never fit, so it waits
+                # for an empty window rather than blocking forever.
+                return self._events[-1][0] + self.window - now
+            needed = self._tokens_in_window + tokens - self.tpm
+            for timestamp, event_tokens in self._events:
+                needed -= event_tokens
+                if needed <= 0:
+                    return timestamp + self.window - now
+        return 0
+
+    def acquire(self, tokens=0):
+        """Blocks until a request costing `tokens` fits within both budgets, then records it."""
+        if not self.rpm and not self.tpm:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._prune(now)
+                delay = self._wait_time(now, tokens)
+                if delay <= 0:
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+            self._sleep(delay)
+
+
+# ==============================================================================
+# RETRIES
+# ==============================================================================
+
+def is_retryable(exc):
+    """Returns True for rate-limit (429) and server-side (5xx) errors, plus transient network failures."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # google.api_core exceptions expose the HTTP status as `.code`.
+    code = getattr(exc, "code", None)
+    if callable(code):
+        code = None
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    return type(exc).__name__ in {
+        "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+        "InternalServerError", "DeadlineExceeded", "BadGateway", "GatewayTimeout",
+    }
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# ==============================================================================
+# BATCH EXECUTION
+# ==============================================================================
+
+@dataclass
+class TaskResult:
+    """Outcome of one work item. Exactly one of `value` and `error` is meaningful."""
+    index: int
+    value: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _run_with_retries(index, item, fn, rate_limiter, token_estimator, max_retries, backoff_base, sleep):
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        if rate_limiter is not None:
+            rate_limiter.acquire(token_estimator(item) if token_estimator else 0)
+        try:
+            value = fn(item)
+            return TaskResult(index, value=value, attempts=attempt, elapsed=time.perf_counter() - started)
+        except Exception as e:
+            if attempt > max_retries or not is_retryable(e):
+                return TaskResult(index, error=e, attempts=attempt, elapsed=time.perf_counter() - started)
+            sleep(backoff_delay(attempt - 1, base=backoff_base))
+
+
+def run_batch(
+    items,
+    fn: Callable[[Any], Any],
+    max_workers=DEFAULT_MAX_WORKERS,
+    rate_limiter: Optional[RateLimiter] = None,
+    token_estimator: Optional[Callable[[Any], int]] = None,
+    max_retries=DEFAULT_MAX_RETRIES,
+    backoff_base=1.0,
+    on_complete: Optional[Callable[[int, int, TaskResult], None]] = None,
+    on_tick: Optional[Callable[[], None]] = None,
+    tick_interval=0.25,
+    sleep=time.sleep,
+):
+    """
+    Runs `fn` over `items` concurrently and returns a list of TaskResult in item order.
+
+    Args:
+        items: The work items, e.g. candidate prompt inputs.
+        fn: Processes one item. Exceptions flagged by `is_retryable` are retried;
+            anything else (or exhausting `max_retries`) is recorded on the result.
+        max_workers (int): Maximum number of requests in flight at once.
+        rate_limiter (RateLimiter): Shared RPM/TPM throttle, checked before every attempt.
+        token_estimator: Returns the estimated token cost of an item for the TPM budget.
+        max_retries (int): Retries allowed per item after the first attempt.
+        backoff_base (float): Base delay in seconds for jittered exponential backoff.
+        on_complete: Called on the calling thread as `on_complete(done, total, result)`
+            each time an item finishes, so UI progress can be updated safely.
+        on_tick: Called on the calling thread at least every `tick_interval` seconds
+            while items are in flight, e.g. to render streamed partial output.
+
+    Returns:
+        list[TaskResult]: One result per item, in the original order.
+    """
+    items = list(items)
+    total = len(items)
+    results = [None] * total
+    if total == 0:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        futures = [
+            executor.submit(
+                _run_with_retries, i, item, fn, rate_limiter, token_estimator,
+                max_retries, backoff_base, sleep,
+            )
+            for i, item in enumerate(items)
+        ]
+        not_done = set(futures)
+        done = 0
+        while not_done:
+            finished, not_done = wait(
+                not_done, timeout=tick_interval if on_tick is not None else None, return_when=FIRST_COMPLETED
+            )
+            for future in finished:
+                result = future.result()
+                results[result.index] = result
+                done += 1
+                if on_complete is not None:
+                    on_complete(done, total, result)
+            if on_tick is not None:
+                on_tick()
+    return results
+
+
+def estimate_tokens(text):
+    """Rough token estimate (about four characters per token) for TPM budgeting."""
+    return max(1, len(text) // 4)
@@ -0,0 +1,385 @@
+"""
+Offline throughput and latency benchmark for the generation pipeline.
+
+Runs the same path as the command-line runner: each cohort is a workbook in
+the template format. Its rows are streamed from disk, validated and scored, turned into prompts,
+generated, validated and written to a results workbook. The Gemini API is
+replaced by `SimulatedBackend`, which answers with rule-compliant summaries
+after a sampled latency and can inject 5xx errors and 429 rate limits at
+configurable rates. No API key or quota is needed.
+
+For each cohort it reports candidates per second, p50/p95/p99 per-candidate
+latency, peak Python memory (tracemalloc) and bytes sent per call.
+
+Example:
+    python benchmark.py --rows 10 1000 10000 --latency lognormal --latency-median 0.05 --rate-limit-rate 0.02
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+from excel_io import StreamingResultWriter, iter_chunks, iter_rows
+from gemini_client import GeminiSession, MockBackend
+from knowledge_base import ASSESSMENT_TYPES, OVERALL, REASONING, SCORE_KEYS, select_interpretations
+from pipeline import (
+    FIRST_TOKEN_COLUMN,
+    REQUIRED_COLUMNS,
+    SUMMARY_COLUMN,
+    VALIDATION_COLUMN,
+    GenerationOptions,
+    generate_summaries,
+)
+from preprocess import prepare_candidates
+from telemetry import percentile
+
+DEFAULT_COHORTS = [10, 1000, 10000]
+LATENCY_DISTRIBUTIONS = ['constant', 'uniform', 'lognormal', 'exponential']
+
+# Backticked INPUT lines in the prompt, as written by knowledge_base.format_candidate_json
+CANDIDATE_INPUT = re.compile(r'^`(\{ ".*\})`$', re.MULTILINE)
+
+
+# ==============================================================================
+# SIMULATED BACKEND
+# ==============================================================================
+
+class SimulatedRateLimit(Exception):
+    """Stands in for google.api_core.exceptions.ResourceExhausted (HTTP 429)."""
+    code = 429
+
+
+class SimulatedServerError(Exception):
+    """Stands in for google.api_core.exceptions.ServiceUnavailable (HTTP 503)."""
+    code = 503
+
+
+@dataclass
+class LatencyModel:
+    """
+    Distribution of simulated response latency, in seconds.
+
+    `median` sets the typical latency. `spread` is the half-width relative to
+    the median for 'uniform' and the log-space sigma for 'lognormal'; it is
+    ignored by 'constant' and 'exponential'.
+    """
+    distribution: str = 'lognormal'
+    median: float = 0.05
+    spread: float = 0.5
+
+    def sample(self, rng):
+        if self.median <= 0:
+            return 0.0
+        if self.distribution == 'constant':
+            return self.median
+        if self.distribution == 'uniform':
+            return rng.uniform(self.median * max(0.0, 1 - self.spread), self.median * (1 + self.spread))
+        if self.distribution == 'lognormal':
+            return self.median * math.exp(rng.gauss(0, self.spread))
+        if self.distribution == 'exponential':
+            # Exponential with this median
+            return rng.expovariate(math.log(2) / self.median)
+        raise ValueError(f"Unknown latency distribution: {self.distribution!r}")
+
+
+def _possessive(pronoun):
+    return 'Her' if str(pronoun).lower().startswith('she') else 'His'
+
+
+def _subject(pronoun):
+    return 'She' if str(pronoun).lower().startswith('she') else 'He'
+
+
+def _first_sentence(text):
+    return text.split('. ')[0].rstrip('.') + '.'
+
+
+def compliant_parts(candidate):
+    """
+    A (paragraph, strengths, development areas) triple that passes `validator.validate_summary`.
+
+    Built from the knowledge-base rows selected for the candidate, so the
+    simulated model never triggers regeneration unless the benchmark asks for it.
+    """
+    subject = _subject(candidate['pronoun'])
+    sentences = []
+    for key, _, text in select_interpretations(candidate):
+        if key == OVERALL:
+            sentences.append(f"{candidate['name']} {text[0].lower()}{text[1:]}")
+        elif key == REASONING:
+            sentences.append(text.replace('His/Her', _possessive(candidate['pronoun'])))
+        else:
+            sentence = _first_sentence(text)
+            sentences.append(f"{subject} {sentence[0].lower()}{sentence[1:]}")
+    strengths = [
+        "Brings a steady and constructive presence to day-to-day work.",
+        "Responds well to clear goals and regular feedback from the line manager.",
+    ]
+    development = [
+        "Would benefit from structured stretch assignments outside the current remit.",
+        "Should seek more regular input from senior stakeholders on priorities.",
+    ]
+    return " ".join(sentences), strengths, development
+
+
+def simulated_response(prompt):
+    """Answers a single or packed prompt with compliant summaries for the candidates it names."""
+    inputs = [json.loads(match) for match in CANDIDATE_INPUT.findall(prompt)]
+    packed = [candidate for candidate in inputs if 'id' in candidate]
+    if packed:
+        answers = []
+        for candidate in packed:
+            paragraph, strengths, development = compliant_parts(candidate)
+            answers.append({
+                'id': candidate['id'], 'paragraph': paragraph,
+                'strengths': strengths, 'development_areas': development,
+            })
+        return json.dumps(answers)
+    # Single requests: the candidate is the last INPUT line, after the few-shot examples
+    paragraph, strengths, development = compliant_parts(inputs[-1])
+    return (
+        paragraph + "\n**Strengths:**\n" + "".join(f"* {line}\n" for line in strengths)
+        + "**Development Areas:**\n" + "".join(f"* {line}\n" for line in development)
+    ).rstrip()
+
+
+class SimulatedBackend(MockBackend):
+    """
+    MockBackend with realistic timing and failures, for benchmarking.
+
+    Every call sleeps for a latency drawn from `latency`, then fails with a
+    429 at `rate_limit_rate` or a 503 at `error_rate`, otherwise answers with
+    a rule-compliant summary (or packed JSON array) for the candidates in the
+    prompt. Only call counts and byte totals are kept, not the prompts.
+    """
+
+    def __init__(self, latency=None, error_rate=0.0, rate_limit_rate=0.0, seed=None, supports_caching=True):
+        super().__init__(responder=simulated_response, supports_caching=supports_caching)
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self.call_count = 0
+        self.bytes_sent = 0
+        self.cache_bytes = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+
+    def record_call(self, prompt):
+        with self.lock:
+            self.call_count += 1
+            self.bytes_sent += len(prompt.encode('utf-8'))
+
+    def cached_model(self, model_name, prefix, ttl):
+        model, handle = super().cached_model(model_name, prefix, ttl)
+        with self.lock:
+            self.cache_bytes += len(prefix.encode('utf-8'))
+        return model, handle
+
+    def respond(self, prompt, cached_prefix=None, generation_config=None):
+        with self.lock:
+            delay = self.latency.sample(self._rng)
+            roll = self._rng.random()
+        time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            with self.lock:
+                self.rate_limited += 1
+            raise SimulatedRateLimit("429 Resource has been exhausted (simulated)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self.lock:
+                self.server_errors += 1
+            raise SimulatedServerError("503 The service is currently unavailable (simulated)")
+        return super().respond(prompt, cached_prefix, generation_config)
+
+
+# ==============================================================================
+# COHORTS
+# ==============================================================================
+
+def write_cohort(path, rows, seed=0):
+    """Writes `rows` random candidates in the template format (see app.create_sample_excel)."""
+    rng = random.Random(seed)
+    with StreamingResultWriter(path, REQUIRED_COLUMNS, sheet_name='Candidates') as writer:
+        for number in range(1, rows + 1):
+            row = {
+                'Name': f"Candidate {number:05d}",
+                'Gender': rng.choice(['M', 'F']),
+                'Type': rng.choice(ASSESSMENT_TYPES),
+            }
+            row.update({key: round(rng.uniform(1.0, 5.0), 2) for key in SCORE_KEYS})
+            writer.write(row)
+
+
+@dataclass
+class BenchmarkReport:
+    rows: int
+    seconds: float
+    candidates_per_second: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    peak_memory_mb: float
+    calls: int
+    bytes_per_call: float
+    cache_bytes: int
+    failed: int
+    regenerated: int
+    rate_limited: int
+    server_errors: int
+
+
+def run_cohort(path, output, options, backend, chunk_size=500):
+    """
+    Runs one workbook through parse, prompt build, generation and write, as cli.py does.
+
+    Returns:
+        BenchmarkReport
+    """
+    columns = REQUIRED_COLUMNS + [SUMMARY_COLUMN, VALIDATION_COLUMN, FIRST_TOKEN_COLUMN]
+    latencies = []
+    done = failed = regenerated = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    with GeminiSession(model_name=options.model_name, use_context_cache=options.use_context_cache,
+                       backend=backend) as session, StreamingResultWriter(output, columns) as writer:
+        rate_limiter = options.rate_limiter()
+        for chunk in iter_chunks(iter_rows(path), chunk_size):
+            prepared = prepare_candidates(pd.DataFrame(chunk, columns=REQUIRED_COLUMNS), row_offset=done)
+            result = generate_summaries(
+                prepared.candidates, session, options, rate_limiter=rate_limiter, rejected=prepared.rejections
+            )
+            for row, summary, validation, first_token in zip(
+                chunk, result.summaries, result.validation_column(), result.first_token_column()
+            ):
+                row[SUMMARY_COLUMN] = summary
+                row[VALIDATION_COLUMN] = validation
+                row[FIRST_TOKEN_COLUMN] = first_token
+                writer.write(row)
+            latencies.extend(metrics.elapsed for metrics in result.metrics if metrics is not None)
+            done += len(chunk)
+            failed += len(result.errors)
+            regenerated += result.regenerated
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return BenchmarkReport(
+        rows=done,
+        seconds=round(seconds, 3),
+        candidates_per_second=round(done / seconds, 2) if seconds else 0.0,
+        latency_p50=percentile(latencies, 50),
+        latency_p95=percentile(latencies, 95),
+        latency_p99=percentile(latencies, 99),
+        peak_memory_mb=round(peak / 2 ** 20, 1),
+        calls=backend.call_count,
+        bytes_per_call=round(backend.bytes_sent / backend.call_count) if backend.call_count else 0,
+        cache_bytes=backend.cache_bytes,
+        failed=failed,
+        regenerated=regenerated,
+        rate_limited=backend.rate_limited,
+        server_errors=backend.server_errors,
+    )
+
+
+def format_report(report):
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.0f}ms"
+
+    return (
+        f"{report.rows:>6} rows  {report.candidates_per_second:>8.2f} cand/s  "
+        f"p50 {ms(report.latency_p50):>7}  p95 {ms(report.latency_p95):>7}  p99 {ms(report.latency_p99):>7}  "
+        f"peak {report.peak_memory_mb:>6.1f}MB  {report.bytes_per_call:>7,.0f} B/call  "
+        f"{report.calls} calls, {report.failed} failed, {report.regenerated} regenerated, "
+        f"{report.rate_limited} x 429, {report.server_errors} x 5xx"
+    )
+
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the generation pipeline offline against a simulated Gemini backend."
+    )
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_COHORTS, help="Cohort sizes to run.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for cohort data, latency and fault injection.")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Rows read, generated and written per chunk.")
+    parser.add_argument('--json', dest='json_path', help="Also write the reports to this JSON file.")
+
+    backend = parser.add_argument_group('simulated backend')
+    backend.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='lognormal',
+                         help="Latency distribution per call.")
+    backend.add_argument('--latency-median', type=float, default=0.05, help="Median latency per call, seconds.")
+    backend.add_argument('--latency-spread', type=float, default=0.5,
+                         help="Relative half-width (uniform) or log sigma (lognormal).")
+    backend.add_argument('--error-rate', type=float, default=0.0, help="Fraction of calls failing with a 503.")
+    backend.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of calls failing with a 429.")
+    backend.add_argument('--no-context-cache', action='store_true', help="Send the static prefix on every call.")
+
+    pipeline = parser.add_argument_group('pipeline')
+    pipeline.add_argument('--workers', type=int, default=GenerationOptions.max_workers, help="Concurrent requests.")
+    pipeline.add_argument('--rpm', type=int, default=0, help="Requests per minute (0 = unlimited).")
+    pipeline.add_argument('--tpm', type=int, default=0, help="Tokens per minute (0 = unlimited).")
+    pipeline.add_argument('--retries', type=int, default=GenerationOptions.max_retries, help="Retries per request.")
+    pipeline.add_argument('--full-prompt', action='store_true', help="Send the full DEFINITIVE_PROMPT.")
+    pipeline.add_argument('--examples', type=int, default=2, help="Few-shot examples per candidate in slim mode.")
+    pipeline.add_argument('--packed', action='store_true', help="Send several candidates per request.")
+    pipeline.add_argument('--pack-size', type=int, default=GenerationOptions.pack_size,
+                          help="Candidates per packed request.")
+    pipeline.add_argument('--stream', action='store_true', help="Stream responses.")
+    pipeline.add_argument('--dedup', action='store_true', help="Share generations across identical tier profiles.")
+    pipeline.add_argument('--no-validate', action='store_true', help="Skip local validation.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    options = GenerationOptions(
+        slim=not args.full_prompt,
+        max_examples=args.examples,
+        packed=args.packed,
+        pack_size=args.pack_size,
+        max_workers=args.workers,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        max_retries=args.retries,
+        use_context_cache=not args.no_context_cache,
+        validate=not args.no_validate,
+        stream=args.stream,
+        dedup=args.dedup,
+    )
+    latency = LatencyModel(args.latency, args.latency_median, args.latency_spread)
+    reports = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            path = os.path.join(workdir, f'cohort_{rows}.xlsx')
+            write_cohort(path, rows, seed=args.seed)
+            backend = SimulatedBackend(
+                latency=latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                seed=args.seed,
+            )
+            report = run_cohort(path, os.path.join(workdir, f'results_{rows}.xlsx'), options, backend,
+                                chunk_size=max(1, args.chunk_size))
+            reports.append(report)
+            print(format_report(report), file=sys.stderr)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'options': asdict(options), 'latency': asdict(latency),
+                       'error_rate': args.error_rate, 'rate_limit_rate': args.rate_limit_rate,
+                       'reports': [asdict(report) for report in reports]}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
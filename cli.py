@@ -0,0 +1,266 @@
+"""
+Headless batch runner: generate executive summaries for a workbook from the command line.
+
+Shares the generation core (pipeline.py) with the Streamlit app. Rows are
+streamed from the input workbook in chunks and results are written
+incrementally, so very large workbooks run with flat memory use.
+
+Example:
+    GOOGLE_API_KEY=... python cli.py candidates.xlsx -o results.xlsx --workers 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from batch import DEFAULT_MAX_RETRIES, DEFAULT_MAX_WORKERS, DEFAULT_RPM, DEFAULT_TPM
+from excel_io import StreamingResultWriter, iter_chunks, iter_rows, read_header
+from gemini_client import MODEL_NAME, GeminiSession, MockBackend
+from journal import DEFAULT_JOURNAL_PATH, JobJournal, export_partial, file_digest, job_id_for
+from packing import DEFAULT_PACK_SIZE, MAX_PACK_SIZE
+from pipeline import (
+    REQUIRED_COLUMNS,
+    FIRST_TOKEN_COLUMN,
+    SUMMARY_COLUMN,
+    VALIDATION_COLUMN,
+    GenerationOptions,
+    generate_summaries,
+    missing_columns,
+)
+from preprocess import ISSUE_COLUMNS, REJECTED, prepare_candidates
+from result_cache import DEFAULT_CACHE_PATH, ResultCache
+from telemetry import TELEMETRY_COLUMNS, RunMetrics
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Generate AI executive summaries for every candidate in an Excel workbook."
+    )
+    parser.add_argument('input', help="Input .xlsx file in the candidate template format.")
+    parser.add_argument('-o', '--output', default='executive_summary_results.xlsx', help="Output .xlsx file.")
+    parser.add_argument('--sheet', help="Input sheet name (defaults to the active sheet).")
+    parser.add_argument('--api-key', default=os.environ.get('GOOGLE_API_KEY'),
+                        help="Google API key (defaults to $GOOGLE_API_KEY).")
+    parser.add_argument('--model', default=MODEL_NAME, help="Gemini model name.")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows read, generated and written per chunk.")
+    parser.add_argument('--check', action='store_true',
+                        help="Only validate the input and report data issues; make no API calls.")
+    parser.add_argument('--issues', help="Write the data issues report to this CSV file.")
+
+    prompt = parser.add_argument_group('prompt')
+    prompt.add_argument('--full-prompt', action='store_true',
+                        help="Send the full DEFINITIVE_PROMPT instead of the candidate-specific prompt.")
+    prompt.add_argument('--examples', type=int, default=2, help="Few-shot examples per candidate in slim mode.")
+    prompt.add_argument('--packed', action='store_true', help="Send several candidates per request.")
+    prompt.add_argument('--pack-size', type=int, default=DEFAULT_PACK_SIZE,
+                        help=f"Candidates per packed request (max {MAX_PACK_SIZE}).")
+    prompt.add_argument('--dedup', action='store_true',
+                        help="Generate once per tier profile and personalize each matching candidate locally. "
+                             "Profiles are grouped within each --chunk-size chunk, so larger chunks share more.")
+    prompt.add_argument('--no-context-cache', action='store_true',
+                        help="Do not register the static prompt prefix as cached content. Prefixes "
+                             "below the model's minimum cache size (e.g. the slim prefix on 2.5 Pro) "
+                             "are always sent inline.")
+
+    validation = parser.add_argument_group('validation')
+    validation.add_argument('--no-validate', action='store_true',
+                            help="Skip the local writing-rule checks and the Validation column.")
+    validation.add_argument('--max-regenerations', type=int, default=2,
+                            help="Regeneration attempts per summary that fails validation.")
+
+    throughput = parser.add_argument_group('throughput')
+    throughput.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent requests.")
+    throughput.add_argument('--rpm', type=int, default=DEFAULT_RPM, help="Requests per minute (0 = unlimited).")
+    throughput.add_argument('--tpm', type=int, default=DEFAULT_TPM, help="Tokens per minute (0 = unlimited).")
+    throughput.add_argument('--retries', type=int, default=DEFAULT_MAX_RETRIES, help="Retries per request.")
+    throughput.add_argument('--stream', action='store_true',
+                            help="Stream responses and record each candidate's time to first token.")
+
+    cache = parser.add_argument_group('result cache')
+    cache.add_argument('--no-result-cache', action='store_true',
+                       help="Always call the API, also for rows this job completed in an earlier run.")
+    cache.add_argument('--cache-path', default=DEFAULT_CACHE_PATH, help="Result cache SQLite file.")
+
+    jobs = parser.add_argument_group('checkpointing')
+    jobs.add_argument('--journal', default=DEFAULT_JOURNAL_PATH,
+                      help="Job journal SQLite file. Completed rows are skipped when a job is rerun.")
+    jobs.add_argument('--job-id', help="Job id (defaults to a hash of the input file and prompt settings).")
+    jobs.add_argument('--export-partial', action='store_true',
+                      help="Write the rows completed so far for this job to --output and exit.")
+
+    telemetry = parser.add_argument_group('telemetry')
+    telemetry.add_argument('--telemetry', action='store_true',
+                           help="Add per-candidate time, attempt, token and cost columns to the output.")
+    telemetry.add_argument('--metrics', help="Write run-level metrics as JSON to this file.")
+
+    parser.add_argument('--mock', action='store_true',
+                        help="Use the local mock backend instead of the Gemini API (dry run). "
+                             "Uses a throwaway journal and no result cache.")
+    return parser
+
+
+def options_from_args(args):
+    return GenerationOptions(
+        slim=not args.full_prompt,
+        max_examples=args.examples,
+        packed=args.packed,
+        pack_size=args.pack_size,
+        max_workers=args.workers,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        max_retries=args.retries,
+        use_context_cache=not args.no_context_cache,
+        model_name=args.model,
+        validate=not args.no_validate,
+        max_regenerations=args.max_regenerations,
+        stream=args.stream,
+        dedup=args.dedup,
+        use_result_cache=not args.no_result_cache,
+    )
+
+
+def report_issues(issues, path=None, limit=20):
+    """Prints a summary of the data issues report and optionally saves it as CSV."""
+    if path:
+        issues.to_csv(path, index=False)
+    if issues.empty:
+        return
+    rejected = issues.loc[issues['Severity'] == REJECTED, 'Row'].nunique()
+    print(f"Data issues: {rejected} rows rejected, {len(issues)} problems in total.", file=sys.stderr)
+    for issue in issues.head(limit).itertuples(index=False):
+        print(f"  row {issue.Row} ({issue.Name}): {issue.Severity.lower()}: {issue.Problem}", file=sys.stderr)
+    if len(issues) > limit:
+        print(f"  ... and {len(issues) - limit} more" + (f" (see {path})" if path else ""), file=sys.stderr)
+
+
+def check_input(path, sheet, header, chunk_size, issues_path=None):
+    """Validates every row without generating anything. Returns the issues report."""
+    rows = 0
+    issues = []
+    for chunk in iter_chunks(iter_rows(path, sheet), chunk_size):
+        issues.append(prepare_candidates(pd.DataFrame(chunk, columns=header), row_offset=rows).issues)
+        rows += len(chunk)
+    report = pd.concat(issues, ignore_index=True) if issues else pd.DataFrame(columns=ISSUE_COLUMNS)
+    report_issues(report, issues_path)
+    rejected = report.loc[report['Severity'] == REJECTED, 'Row'].nunique()
+    print(f"Checked {rows} rows: {rows - rejected} ready, {rejected} rejected.", file=sys.stderr)
+    return report
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.mock:
+        # Dry runs keep their journal in a scratch directory and skip the result cache,
+        # so mock summaries are never resumed or served to a real run.
+        with tempfile.TemporaryDirectory() as scratch:
+            args.journal = os.path.join(scratch, 'jobs.sqlite3')
+            args.no_result_cache = True
+            return run(args)
+    return run(args)
+
+
+def run(args):
+    """Runs a generation (or check or export) for parsed arguments. Returns the exit code."""
+    options = options_from_args(args)
+    journal = JobJournal(args.journal)
+    job_id = args.job_id or job_id_for(file_digest(args.input), options)
+
+    if args.export_partial:
+        written = export_partial(journal, job_id, args.output, SUMMARY_COLUMN)
+        print(f"Wrote {written} completed rows of job {job_id} to {args.output}", file=sys.stderr)
+        return 0
+
+    header = read_header(args.input, args.sheet)
+    missing = missing_columns(header)
+    if missing:
+        print(f"error: the input is missing required columns: {', '.join(missing)}. "
+              f"Required columns are: {', '.join(REQUIRED_COLUMNS)}", file=sys.stderr)
+        return 2
+
+    if args.check:
+        issues = check_input(args.input, args.sheet, header, max(1, args.chunk_size), args.issues)
+        return 1 if (issues['Severity'] == REJECTED).any() else 0
+
+    if not args.api_key and not args.mock:
+        print("error: a Google API key is required (--api-key or $GOOGLE_API_KEY).", file=sys.stderr)
+        return 2
+
+    rate_limiter = options.rate_limiter()
+    result_cache = None
+    if options.use_result_cache:
+        result_cache = ResultCache(args.cache_path)
+        result_cache.invalidate_stale()
+        result_cache.evict()
+
+    output_columns = (
+        [SUMMARY_COLUMN]
+        + ([VALIDATION_COLUMN] if options.validate else [])
+        + ([FIRST_TOKEN_COLUMN] if options.stream else [])
+        + (TELEMETRY_COLUMNS if args.telemetry else [])
+    )
+    columns = [column for column in header if column and column not in output_columns] + output_columns
+    if not journal.start_job(job_id, header, source=os.path.abspath(args.input)) and result_cache is not None:
+        progress = journal.progress(job_id)
+        print(f"Resuming job {job_id}: {progress['done']} rows already done, "
+              f"{progress['failed']} to retry.", file=sys.stderr)
+    backend = MockBackend() if args.mock else None
+    started = time.perf_counter()
+    done = failed = 0
+    metrics = RunMetrics(options)
+    issues = []
+
+    with GeminiSession(args.api_key, model_name=options.model_name,
+                       use_context_cache=options.use_context_cache, backend=backend) as session, \
+            StreamingResultWriter(args.output, columns) as writer:
+        for chunk in iter_chunks(iter_rows(args.input, args.sheet), max(1, args.chunk_size)):
+            journal.add_rows(job_id, chunk, start_index=done)
+            prepared = prepare_candidates(pd.DataFrame(chunk, columns=header), row_offset=done)
+            issues.append(prepared.issues)
+            result = generate_summaries(
+                prepared.candidates, session, options, result_cache=result_cache, rate_limiter=rate_limiter,
+                journal=journal, job_id=job_id, row_offset=done, rejected=prepared.rejections,
+                resume=result_cache is not None,
+            )
+            for row, summary, validation, first_token in zip(
+                chunk, result.summaries, result.validation_column(), result.first_token_column()
+            ):
+                row[SUMMARY_COLUMN] = summary
+                row[VALIDATION_COLUMN] = validation
+                row[FIRST_TOKEN_COLUMN] = first_token
+            for column, values in result.telemetry_columns(options.model_name).items():
+                for row, value in zip(chunk, values):
+                    row[column] = value
+            for row in chunk:
+                writer.write(row)
+            metrics.add(result)
+            done += len(chunk)
+            failed += len(result.errors) + len(result.rejected)
+            elapsed = time.perf_counter() - started
+            print(f"{done} rows processed, {failed} failed ({done / elapsed:.2f} rows/s)", file=sys.stderr)
+
+    if result_cache is not None:
+        print(f"Result cache: {result_cache.hits} hits, {result_cache.misses} misses.", file=sys.stderr)
+    report_issues(pd.concat(issues, ignore_index=True) if issues else pd.DataFrame(columns=ISSUE_COLUMNS), args.issues)
+    summary = metrics.summary()
+    if summary['dedup_groups']:
+        print(f"Deduplication: {summary['deduplicated']} rows from {summary['dedup_groups']} shared generations "
+              f"({summary['dedup_ratio']:.1f} rows per call).", file=sys.stderr)
+    if summary['estimated_cost_usd'] is not None:
+        print(f"Tokens: {summary['prompt_tokens']} prompt ({summary['cached_tokens']} cached), "
+              f"{summary['output_tokens']} output; estimated cost ${summary['estimated_cost_usd']:.4f}.",
+              file=sys.stderr)
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            f.write(metrics.to_json())
+    print(f"Wrote {done} rows to {args.output} (job {job_id})", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Tier-profile deduplication: one generation per group of equivalent candidates.
+
+Everything the knowledge base contributes to a summary is fixed by the
+assessment type, the tier of each of the eight scores, and the competencies
+picked for the bullet points (with any competencies tied with those picks). Candidates that share this profile get the same
+interpretation text. Each group is therefore generated once, for a
+placeholder candidate written as "He/His". The result is then personalized
+locally for every member: the placeholder is replaced with the member's name,
+and pronouns are rewritten for members who use She/Her. He/his/him map
+one-to-one onto she/her/her, so the rewrite is unambiguous in that direction.
+"""
+import re
+from collections import defaultdict
+
+from knowledge_base import SCORE_KEYS, score_tier
+
+PLACEHOLDER_NAME = "[CANDIDATE NAME]"
+PLACEHOLDER_PRONOUN = "He/His"
+
+_MASCULINE = re.compile(r"\b(he|his|him|himself)\b", re.IGNORECASE)
+_FEMININE = {'he': 'she', 'his': 'her', 'him': 'her', 'himself': 'herself'}
+
+
+def profile_key(candidate):
+    """The inputs that determine a candidate's knowledge-base text: type, tiers, bullet picks and their ties."""
+    tiers = candidate.get('tiers') or {}
+    return (
+        candidate['assessment_type'],
+        tuple(tiers.get(key) or score_tier(candidate['scores'][key]) for key in SCORE_KEYS),
+        tuple(candidate.get('strengths') or ()),
+        tuple(candidate.get('development_areas') or ()),
+        tuple(candidate.get('strength_ties') or ()),
+        tuple(candidate.get('development_ties') or ()),
+    )
+
+
+def group_by_profile(candidates, indices):
+    """
+    Groups candidate positions by profile.
+
+    Returns:
+        list[list[int]]: Groups of two or more positions, in first-appearance order.
+            Candidates with a unique profile are left out; deduplicating them saves nothing.
+    """
+    groups = defaultdict(list)
+    for index in indices:
+        groups[profile_key(candidates[index])].append(index)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def placeholder_candidate(candidate):
+    """The group representative sent to the model: the same profile under a placeholder identity."""
+    return dict(candidate, name=PLACEHOLDER_NAME, pronoun=PLACEHOLDER_PRONOUN)
+
+
+def _feminine(match):
+    word = match.group(0)
+    replacement = _FEMININE[word.lower()]
+    if word.isupper() and len(word) > 1:
+        return replacement.upper()
+    return replacement.capitalize() if word[0].isupper() else replacement
+
+
+def personalize(summary, candidate):
+    """
+    Rewrites a placeholder summary for one group member.
+
+    Raises:
+        ValueError: If the summary never names the placeholder, so it cannot be personalized.
+    """
+    if PLACEHOLDER_NAME not in summary:
+        raise ValueError("The shared summary does not name the candidate, so it cannot be personalized.")
+    if str(candidate['pronoun']).lower().startswith('she'):
+        summary = _MASCULINE.sub(_feminine, summary)
+    return summary.replace(PLACEHOLDER_NAME, str(candidate['name']))
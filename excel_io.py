@@ -0,0 +1,94 @@
+"""
+Streaming Excel input and output for workbooks too large to hold in memory.
+
+`iter_rows` reads a workbook with openpyxl in read-only mode and yields one
+header->value dict per data row. `StreamingResultWriter` writes rows with
+XlsxWriter in constant-memory mode, which flushes each row to disk as soon as
+the next one starts. Memory use therefore stays flat however many rows the
+workbook has.
+"""
+import itertools
+
+import openpyxl
+import xlsxwriter
+
+RESULTS_SHEET = 'Results'
+
+
+def _is_blank(values):
+    return all(value is None or (isinstance(value, str) and not value.strip()) for value in values)
+
+
+def read_header(path, sheet_name=None):
+    """Returns the header row of a workbook sheet as a list of column names."""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        first = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        return [str(value).strip() if value is not None else '' for value in first]
+    finally:
+        workbook.close()
+
+
+def iter_rows(path, sheet_name=None):
+    """
+    Yields each data row of a sheet as a {column name: value} dict.
+
+    Args:
+        path (str): The .xlsx file to read.
+        sheet_name (str): Sheet to read; the active sheet by default.
+
+    Blank rows are skipped. The workbook is opened read-only, so rows are
+    parsed lazily rather than loaded up front.
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else '' for value in next(rows, ())]
+        for values in rows:
+            if _is_blank(values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_chunks(iterable, size):
+    """Yields lists of up to `size` consecutive items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class StreamingResultWriter:
+    """
+    Appends result rows to an .xlsx file in XlsxWriter constant-memory mode.
+
+    Rows must be written in order; each one is flushed to disk once the next
+    row starts. Use as a context manager so the workbook is always closed.
+    """
+
+    def __init__(self, path, columns, sheet_name=RESULTS_SHEET):
+        self.columns = list(columns)
+        self._workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+        self._sheet = self._workbook.add_worksheet(sheet_name)
+        self._sheet.write_row(0, 0, self.columns)
+        self.rows_written = 0
+
+    def write(self, row):
+        """Writes one {column name: value} dict as the next row."""
+        self.rows_written += 1
+        self._sheet.write_row(self.rows_written, 0, [row.get(column) for column in self.columns])
+
+    def close(self):
+        self._workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,348 @@
+"""
+Gemini client/session layer shared by every worker in a run.
+
+A GeminiSession configures the SDK once and keeps one model instance per
+prompt prefix. Where the API supports it, each static prefix (the full
+DEFINITIVE_PROMPT or the slim prompt's shared rules) is registered as cached
+content on the first request that uses it. After that, requests send only
+the candidate-specific delta. Prefixes below the model's minimum cacheable
+size (the slim prefix, about 1.1k tokens, is under Gemini 2.5 Pro's 4,096)
+are never registered, and a prefix that fails to cache for any other reason
+is sent inline as before. A long-lived session extends each cache's TTL once
+half of it has passed, and registers the prefix again if the cache is gone.
+
+The SDK sits behind a small backend interface, so MockBackend can stand in
+for the remote service in tests and offline runs.
+"""
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from knowledge_base import build_prompt_parts
+
+MODEL_NAME = 'gemini-2.5-pro'
+DEFAULT_CACHE_TTL = datetime.timedelta(hours=1)
+
+# Smallest prompt prefix, in tokens, that each model accepts as cached content.
+MIN_CACHE_TOKENS = {
+    'gemini-2.5-pro': 4096,
+    'gemini-2.5-flash': 1024,
+}
+
+
+def is_cacheable(model_name, prefix):
+    """False when `prefix` is clearly below the model's minimum cached-content size."""
+    # About four characters per token, as in batch.estimate_tokens
+    return len(prefix) // 4 >= MIN_CACHE_TOKENS.get(model_name, 0)
+
+
+# ==============================================================================
+# BACKENDS
+# ==============================================================================
+
+class GenaiBackend:
+    """The real Gemini API via the google-generativeai SDK."""
+
+    def __init__(self, api_key):
+        import google.generativeai as genai
+        self._genai = genai
+        genai.configure(api_key=api_key)
+
+    def model(self, model_name):
+        return self._genai.GenerativeModel(model_name)
+
+    def cached_model(self, model_name, prefix, ttl):
+        """Registers `prefix` as cached content and returns (model bound to it, cache handle)."""
+        from google.generativeai import caching
+        qualified = model_name if model_name.startswith('models/') else f'models/{model_name}'
+        cached = caching.CachedContent.create(
+            model=qualified,
+            display_name=f'executive-summary-{hashlib.sha256(prefix.encode()).hexdigest()[:12]}',
+            contents=[prefix],
+            ttl=ttl,
+        )
+        return self._genai.GenerativeModel.from_cached_content(cached_content=cached), cached
+
+    def refresh_cache(self, handle, ttl):
+        """Extends a cache's expiry to `ttl` from now."""
+        handle.update(ttl=ttl)
+
+    def delete_cache(self, handle):
+        handle.delete()
+
+
+@dataclass
+class MockUsage:
+    prompt_token_count: int = 0
+    cached_content_token_count: int = 0
+    candidates_token_count: int = 0
+    total_token_count: int = 0
+
+
+@dataclass
+class MockResponse:
+    text: str
+    usage_metadata: MockUsage
+
+
+class MockStreamResponse:
+    """Mirrors a streamed SDK response: iterate for chunks; `text` and `usage_metadata` afterwards."""
+
+    def __init__(self, response, chunk_chars=40):
+        self._response = response
+        self._chunk_chars = chunk_chars
+        self.text = response.text
+        self.usage_metadata = response.usage_metadata
+
+    def __iter__(self):
+        text = self._response.text
+        for start in range(0, len(text), self._chunk_chars):
+            yield MockResponse(text=text[start:start + self._chunk_chars], usage_metadata=None)
+
+
+class MockModel:
+    """Stands in for genai.GenerativeModel. Returns a canned summary for any prompt."""
+
+    def __init__(self, backend, cached_prefix=None):
+        self._backend = backend
+        self.cached_prefix = cached_prefix
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        prompt = contents if isinstance(contents, str) else "".join(contents)
+        self._backend.record_call(prompt)
+        response = self._backend.respond(prompt, self.cached_prefix, generation_config)
+        return MockStreamResponse(response) if stream else response
+
+
+class MockBackend:
+    """
+    Local stand-in for the Gemini API.
+
+    Records every prompt sent in `calls` and every cache created in `caches`.
+    `respond` builds the reply; override it or pass `responder(prompt) -> str`
+    to script specific outputs. Override `record_call` to keep something
+    lighter than every prompt, e.g. for long benchmark runs.
+    """
+
+    def __init__(self, responder=None, supports_caching=True):
+        self.responder = responder
+        self.supports_caching = supports_caching
+        self.calls = []
+        self.caches = []
+        self.refreshed_caches = []
+        self.deleted_caches = []
+        self.lock = threading.Lock()
+
+    def record_call(self, prompt):
+        with self.lock:
+            self.calls.append(prompt)
+
+    def respond(self, prompt, cached_prefix=None, generation_config=None):
+        if self.responder:
+            text = self.responder(prompt)
+        elif (generation_config or {}).get('response_mime_type') == 'application/json':
+            # Packed requests: answer every candidate id found in the prompt.
+            ids = re.findall(r'`\{ "id": "([^"]+)"', prompt)
+            text = json.dumps([
+                {
+                    'id': candidate_id,
+                    'paragraph': "Mock executive summary.",
+                    'strengths': ["Mock strength one.", "Mock strength two."],
+                    'development_areas': ["Mock development area one.", "Mock development area two."],
+                }
+                for candidate_id in ids
+            ])
+        else:
+            text = (
+                "Mock executive summary.\n**Strengths:**\n* Mock strength one.\n* Mock strength two.\n"
+                "**Development Areas:**\n* Mock development area one.\n* Mock development area two."
+            )
+        prompt_tokens = len(prompt) // 4
+        cached_tokens = len(cached_prefix) // 4 if cached_prefix else 0
+        output_tokens = len(text) // 4
+        usage = MockUsage(
+            prompt_token_count=prompt_tokens + cached_tokens,
+            cached_content_token_count=cached_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + cached_tokens + output_tokens,
+        )
+        return MockResponse(text=text, usage_metadata=usage)
+
+    def model(self, model_name):
+        return MockModel(self)
+
+    def cached_model(self, model_name, prefix, ttl):
+        if not self.supports_caching:
+            raise RuntimeError("Context caching is not supported by this backend.")
+        with self.lock:
+            self.caches.append(prefix)
+        return MockModel(self, cached_prefix=prefix), prefix
+
+    def refresh_cache(self, handle, ttl):
+        with self.lock:
+            self.refreshed_caches.append(handle)
+
+    def delete_cache(self, handle):
+        with self.lock:
+            self.deleted_caches.append(handle)
+
+
+# ==============================================================================
+# SESSION
+# ==============================================================================
+
+class GeminiSession:
+    """
+    One configured Gemini model per run, shared across worker threads.
+
+    Args:
+        api_key (str): The Google API key. Ignored when `backend` is given.
+        model_name (str): The Gemini model to call.
+        use_context_cache (bool): Register static prompt prefixes as cached content.
+        cache_ttl (datetime.timedelta): How long cached prefixes live on the server.
+        backend: A GenaiBackend-compatible object, e.g. MockBackend for tests.
+        clock: Monotonic time source in seconds, used to schedule cache refreshes.
+
+    Use as a context manager so cached content is deleted when the run ends.
+    """
+
+    def __init__(self, api_key=None, model_name=MODEL_NAME, use_context_cache=True,
+                 cache_ttl=DEFAULT_CACHE_TTL, backend=None, clock=time.monotonic):
+        self.model_name = model_name
+        self.use_context_cache = use_context_cache
+        self.cache_ttl = cache_ttl
+        self._backend = backend if backend is not None else GenaiBackend(api_key)
+        self._model = self._backend.model(model_name)
+        self._cached_models = {}  # prefix -> model bound to cached content, or None if uncacheable
+        self._cache_handles = []
+        self._cache_refresh = {}  # prefix -> (cache handle, clock time to extend its TTL)
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _refresh_time(self):
+        # Extend at half the TTL, well before the server drops the cache.
+        return self._clock() + self.cache_ttl.total_seconds() / 2
+
+    def _model_for_prefix(self, prefix):
+        """Returns the cached-content model for `prefix`, creating it on first use, or None."""
+        if not self.use_context_cache or not is_cacheable(self.model_name, prefix):
+            return None
+        with self._lock:
+            if prefix in self._cache_refresh:
+                handle, refresh_at = self._cache_refresh[prefix]
+                if self._clock() >= refresh_at:
+                    try:
+                        self._backend.refresh_cache(handle, self.cache_ttl)
+                        self._cache_refresh[prefix] = (handle, self._refresh_time())
+                    except Exception:
+                        # Expired or deleted on the server: register the prefix again.
+                        del self._cache_refresh[prefix]
+                        del self._cached_models[prefix]
+            if prefix not in self._cached_models:
+                try:
+                    model, handle = self._backend.cached_model(self.model_name, prefix, self.cache_ttl)
+                    self._cache_handles.append(handle)
+                    self._cache_refresh[prefix] = (handle, self._refresh_time())
+                except Exception:
+                    # Too small to cache, unsupported model, or no caching quota:
+                    # the prefix is sent inline instead.
+                    model = None
+                self._cached_models[prefix] = model
+            return self._cached_models[prefix]
+
+    def generate(self, prefix, delta, **kwargs):
+        """
+        Sends one request and returns the raw SDK response. API errors propagate.
+
+        Keyword arguments (e.g. `generation_config`) are passed to `generate_content`.
+        """
+        cached_model = self._model_for_prefix(prefix)
+        if cached_model is not None:
+            return cached_model.generate_content(delta, **kwargs)
+        return self._model.generate_content(prefix + delta, **kwargs)
+
+    def close(self):
+        """Deletes any cached content created by this session."""
+        with self._lock:
+            handles, self._cache_handles = self._cache_handles, []
+            self._cached_models = {}
+            self._cache_refresh = {}
+        for handle in handles:
+            try:
+                self._backend.delete_cache(handle)
+            except Exception:
+                # Caches expire on their own after the TTL.
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _chunk_text(chunk):
+    # Streamed chunks without text parts (e.g. the final usage-only chunk) raise on `.text`.
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+
+def generate_summary_for_candidate(session, candidate, slim=True, max_examples=2, feedback=None, on_text=None,
+                                   on_usage=None):
+    """
+    Generates a single executive summary by calling the Gemini API.
+
+    Args:
+        session (GeminiSession): The shared, already configured session.
+        candidate (dict): {'name', 'pronoun', 'assessment_type', 'scores'}.
+        slim (bool): Send the candidate-specific prompt rather than the full DEFINITIVE_PROMPT.
+        max_examples (int): Few-shot examples to include in slim mode.
+        feedback (list[str]): Rules a previous draft broke, from `validator.validate_summary`.
+            They are appended to the request so the regenerated draft corrects them.
+        on_text: When given, the response is streamed and `on_text(text_so_far)` is
+            called from the worker thread as each chunk arrives.
+        on_usage: Called as `on_usage(usage_metadata)` once the response is complete,
+            for per-candidate token and cost telemetry.
+
+    Returns:
+        str: The AI-generated executive summary.
+
+    Raises:
+        Exception: Any API error is propagated so the batch executor can retry
+            rate-limit and server errors and record the rest. A streamed response
+            without any text raises ValueError.
+    """
+    prefix, delta = build_prompt_parts(candidate, slim=slim, max_examples=max_examples)
+    if feedback:
+        # Editing this text needs a knowledge_base.PROMPT_TEMPLATE_VERSION bump
+        delta += (
+            "\n**Corrections Required:** A previous draft for this candidate broke these rules: "
+            + "; ".join(feedback) + ". Write a new draft that follows every rule in Part 3.\n"
+        )
+    if on_text is None:
+        response = session.generate(prefix, delta)
+        if on_usage is not None:
+            on_usage(response.usage_metadata)
+        return response.text
+
+    parts = []
+    response = session.generate(prefix, delta, stream=True)
+    for chunk in response:
+        text = _chunk_text(chunk)
+        if text:
+            parts.append(text)
+            on_text("".join(parts))
+    # A streamed response reports usage once it has been fully iterated
+    if on_usage is not None:
+        on_usage(response.usage_metadata)
+    if not parts:
+        # A blocked or empty response has no text parts. Raise like `response.text` does
+        # off-stream, so the row is recorded as an error rather than an empty summary.
+        raise ValueError("The streamed response contained no text.")
+    return "".join(parts)
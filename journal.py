@@ -0,0 +1,202 @@
+"""
+Durable job journal for checkpointing and resuming long generation runs.
+
+A job is one input workbook generated with one prompt version and set of
+prompt settings. Its id is derived from the file contents, the prompt
+version and those settings, so re-uploading the same workbook finds the
+same job until DEFINITIVE_PROMPT changes. Every input row is registered with the
+job, and every summary is written to the journal as soon as it arrives. An
+interrupted job (closed tab, restarted session, crashed process) therefore
+resumes where it stopped: completed rows are skipped, and only rows that
+failed or never ran are generated again. `export_partial` writes whatever has
+completed so far to a results workbook at any time.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from excel_io import StreamingResultWriter
+from knowledge_base import PROMPT_VERSION
+from sqlite_store import connect, json_default
+
+DEFAULT_JOURNAL_PATH = os.environ.get(
+    'SUMMARY_JOURNAL_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'executive-summary', 'jobs.sqlite3'),
+)
+
+STATUS_PENDING = 'pending'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def file_digest(source, block_size=1 << 20):
+    """SHA-256 of a file path, file-like object or bytes, read in blocks."""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+    elif hasattr(source, 'read'):
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    else:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def job_id_for(digest, options):
+    """Job id for an input file digest plus the prompt version and settings that change its summaries."""
+    payload = json.dumps(
+        {
+            'input': digest, 'prompt_version': PROMPT_VERSION, 'model': options.model_name,
+            'prompt': options.prompt_settings(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class JobJournal:
+    """
+    SQLite-backed record of jobs, their input rows and each row's result.
+
+    Safe to share across threads; each operation uses its own connection.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with connect(self.path) as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    source TEXT,
+                    columns TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_rows (
+                    job_id TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    summary TEXT,
+                    error TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, row_index)
+                );
+                """
+            )
+
+    def start_job(self, job_id, columns, source=None):
+        """Creates the job if it does not exist yet. Returns True if it was created."""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            created = conn.execute(
+                "INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?, ?)",
+                (job_id, source, json.dumps(list(columns)), now, now),
+            ).rowcount
+        return bool(created)
+
+    def add_rows(self, job_id, rows, start_index=0):
+        """Registers input rows (header->value dicts) from `start_index`. Rows already known are kept."""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO job_rows (job_id, row_index, data, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (job_id, start_index + offset, json.dumps(row, default=json_default), STATUS_PENDING, now)
+                    for offset, row in enumerate(rows)
+                ],
+            )
+
+    def record(self, job_id, row_index, summary, error=None):
+        """
+        Persists one row's outcome immediately.
+
+        For a failure, `summary` is the error text written to the results column;
+        the row is marked failed and retried on resume.
+        """
+        now = time.time()
+        status = STATUS_FAILED if error is not None else STATUS_DONE
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "UPDATE job_rows SET status = ?, summary = ?, error = ?, updated_at = ? WHERE job_id = ? AND row_index = ?",
+                (status, summary, None if error is None else str(error), now, job_id, row_index),
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (now, job_id))
+
+    def completed(self, job_id, start_index=0, stop_index=None):
+        """Returns {row index: summary} for rows already done, optionally within [start, stop)."""
+        query = "SELECT row_index, summary FROM job_rows WHERE job_id = ? AND status = ? AND row_index >= ?"
+        params = [job_id, STATUS_DONE, start_index]
+        if stop_index is not None:
+            query += " AND row_index < ?"
+            params.append(stop_index)
+        with self._lock, connect(self.path) as conn:
+            return dict(conn.execute(query, params).fetchall())
+
+    def progress(self, job_id):
+        """Returns {'total', 'done', 'failed', 'pending'} row counts for a job."""
+        with self._lock, connect(self.path) as conn:
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM job_rows WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        done, failed, pending = (counts.get(s, 0) for s in (STATUS_DONE, STATUS_FAILED, STATUS_PENDING))
+        return {'total': done + failed + pending, 'done': done, 'failed': failed, 'pending': pending}
+
+    def columns(self, job_id):
+        """The input column names registered for a job, or None if the job is unknown."""
+        with self._lock, connect(self.path) as conn:
+            row = conn.execute("SELECT columns FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_results(self, job_id, include_pending=False):
+        """Yields (row index, input row dict, status, summary) in row order."""
+        query = "SELECT row_index, data, status, summary FROM job_rows WHERE job_id = ?"
+        if not include_pending:
+            query += f" AND status != '{STATUS_PENDING}'"
+        query += " ORDER BY row_index"
+        with self._lock, connect(self.path) as conn:
+            rows = conn.execute(query, (job_id,)).fetchall()
+        for row_index, data, status, summary in rows:
+            yield row_index, json.loads(data), status, summary
+
+    def delete_job(self, job_id):
+        with self._lock, connect(self.path) as conn:
+            conn.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def clear(self):
+        """Deletes every job, so no earlier summary is resumed. Returns the number of jobs removed."""
+        with self._lock, connect(self.path) as conn:
+            conn.execute("DELETE FROM job_rows")
+            return conn.execute("DELETE FROM jobs").rowcount
+
+
+def export_partial(journal, job_id, output, summary_column, include_pending=False):
+    """
+    Writes the rows of a job that have finished so far to a results workbook.
+
+    Args:
+        journal (JobJournal): The journal holding the job.
+        job_id (str): The job to export.
+        output: A file path or writable binary file object.
+        summary_column (str): Name of the summary column to append.
+        include_pending (bool): Also write rows that have not run yet, with a blank summary.
+
+    Returns:
+        int: Number of rows written.
+    """
+    columns = [c for c in (journal.columns(job_id) or []) if c and c != summary_column] + [summary_column]
+    with StreamingResultWriter(output, columns) as writer:
+        for _, row, _, summary in journal.iter_results(job_id, include_pending=include_pending):
+            row[summary_column] = summary
+            writer.write(row)
+        return writer.rows_written
@@ -0,0 +1,166 @@
+"""
+Packed mode: several candidates per Gemini request, with structured JSON output.
+
+Every API call pays a fixed overhead plus the static prompt. Packed mode
+sends K candidates in one request and asks for a JSON array keyed by
+candidate id. Each entry is validated, rendered back into the same
+paragraph + bullet layout that single-candidate mode produces, and split
+back into rows. A candidate that is missing from the response or malformed
+is returned as unresolved, so the caller can regenerate it in
+single-candidate mode.
+"""
+import json
+import re
+
+from knowledge_base import (
+    DEFINITIVE_PROMPT,
+    SLIM_STATIC_PREFIX,
+    format_candidate_json,
+    normalize_assessment_type,
+    render_bullet_selection,
+    render_interpretation_table,
+    select_examples,
+)
+
+DEFAULT_PACK_SIZE = 5
+MAX_PACK_SIZE = 20
+
+PACKED_GENERATION_CONFIG = {'response_mime_type': 'application/json'}
+
+# Editing this or the packed Part 2 below needs a knowledge_base.PROMPT_TEMPLATE_VERSION bump.
+PACKED_OUTPUT_INSTRUCTIONS = """### PART 6: BATCH OUTPUT FORMAT
+
+This request contains several candidates. Apply Parts 1-5 to each candidate independently and never mix text between candidates.
+Return ONLY a JSON array with exactly one object per candidate, using each candidate's "id" exactly as given:
+[{"id": "<candidate id>", "paragraph": "<the full summary paragraph>", "strengths": ["<strength 1>", "<strength 2>"], "development_areas": ["<development area 1>", "<development area 2>"]}]
+Do not include markdown, bullet characters or any text outside the JSON array."""
+
+
+def make_packs(indices, pack_size=DEFAULT_PACK_SIZE):
+    """Splits row indices into consecutive packs of at most `pack_size`."""
+    indices = list(indices)
+    pack_size = max(1, min(int(pack_size), MAX_PACK_SIZE))
+    return [indices[start:start + pack_size] for start in range(0, len(indices), pack_size)]
+
+
+def candidate_id(position):
+    """The id a candidate is given inside a pack."""
+    return f"C{position + 1}"
+
+
+def build_packed_prompt_parts(candidates, slim=True, max_examples=2):
+    """
+    Builds one request for several candidates as a (static prefix, delta) pair.
+
+    The prefix is the same one single-candidate mode uses, so cached content is
+    shared between the two modes. In slim mode the delta carries each candidate's
+    selected interpretation rows and Rule 3.4 bullet picks, and the union of their
+    closest examples.
+    """
+    inputs = "\n".join(format_candidate_json(c, candidate_id(i)) for i, c in enumerate(candidates))
+    to_process = f"**Candidates to Process**\n**INPUT:**\n{inputs}\n"
+    if not slim:
+        return DEFINITIVE_PROMPT, "\n\n" + PACKED_OUTPUT_INSTRUCTIONS + "\n\n" + to_process
+
+    tables = []
+    for i, c in enumerate(candidates):
+        table = (
+            f"**Candidate {candidate_id(i)} (Assessment Type: {normalize_assessment_type(c['assessment_type'])})**\n"
+            f"{render_interpretation_table(c)}"
+        )
+        if c.get('strengths'):
+            table += "\n\n" + render_bullet_selection(c)
+        tables.append(table)
+    part2 = (
+        "### PART 2: KNOWLEDGE BASE\n\n"
+        "These are the exact interpretation texts that apply to each candidate. "
+        "They have already been selected from the rulebook based on each candidate's scores.\n\n"
+        + "\n\n".join(tables)
+    )
+    examples = []
+    for c in candidates:
+        for example in select_examples(c, max_examples):
+            if example not in examples:
+                examples.append(example)
+    part5 = "### PART 5: FEW-SHOT EXAMPLES (GOLD STANDARD MODELS)\n\n" + "\n\n".join(e['text'] for e in examples)
+    delta = "\n\n" + "\n\n".join([part2, part5, PACKED_OUTPUT_INSTRUCTIONS]) + "\n\n" + to_process
+    return SLIM_STATIC_PREFIX, delta
+
+
+def render_summary(paragraph, strengths, development_areas):
+    """Renders structured output in the same layout as a single-candidate summary."""
+    lines = [paragraph.strip(), "**Strengths:**"]
+    lines += [f"* {s.strip()}" for s in strengths]
+    lines.append("**Development Areas:**")
+    lines += [f"* {d.strip()}" for d in development_areas]
+    return "\n".join(lines)
+
+
+def _is_text_list(value, length):
+    return isinstance(value, list) and len(value) == length and all(isinstance(v, str) and v.strip() for v in value)
+
+
+def parse_packed_response(text, ids):
+    """
+    Validates a packed JSON response and splits it by candidate id.
+
+    Args:
+        text (str): The raw response text.
+        ids (list[str]): The candidate ids that were sent.
+
+    Returns:
+        dict[str, str]: Rendered summaries for every id with a well-formed entry.
+            Ids that are missing, duplicated or malformed are left out.
+    """
+    # Tolerate a markdown code fence around the JSON.
+    text = re.sub(r'^\s*```(?:json)?\s*|\s*```\s*$', '', text or '')
+    try:
+        entries = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    wanted = set(ids)
+    seen = {}
+    duplicates = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get('id') not in wanted:
+            continue
+        if entry['id'] in seen:
+            duplicates.add(entry['id'])
+            continue
+        paragraph = entry.get('paragraph')
+        if not (isinstance(paragraph, str) and paragraph.strip()):
+            continue
+        if not (_is_text_list(entry.get('strengths'), 2) and _is_text_list(entry.get('development_areas'), 2)):
+            continue
+        seen[entry['id']] = render_summary(paragraph, entry['strengths'], entry['development_areas'])
+    return {key: value for key, value in seen.items() if key not in duplicates}
+
+
+def generate_packed_summaries(session, candidates, slim=True, max_examples=2, on_usage=None):
+    """
+    Generates summaries for several candidates in one request.
+
+    Args:
+        session (GeminiSession): The shared session.
+        candidates (list[dict]): The candidates in this pack.
+        slim (bool): Send only the candidate-specific knowledge base and examples.
+        max_examples (int): Few-shot examples per candidate in slim mode.
+        on_usage: Called as `on_usage(usage_metadata)` with the whole pack's usage.
+
+    Returns:
+        dict[int, str]: Summaries keyed by position in `candidates`. Positions that
+            are absent should be regenerated in single-candidate mode.
+
+    Raises:
+        Exception: API errors propagate so the batch executor can retry them.
+    """
+    prefix, delta = build_packed_prompt_parts(candidates, slim=slim, max_examples=max_examples)
+    response = session.generate(prefix, delta, generation_config=PACKED_GENERATION_CONFIG)
+    if on_usage is not None:
+        on_usage(response.usage_metadata)
+    ids = [candidate_id(i) for i in range(len(candidates))]
+    parsed = parse_packed_response(response.text, ids)
+    return {i: parsed[cid] for i, cid in enumerate(ids) if cid in parsed}
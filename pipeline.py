@@ -0,0 +1,377 @@
+"""
+The generation core shared by the Streamlit app and the command-line runner.
+
+`generate_summaries` takes the candidate records built by
+`preprocess.prepare_candidates` and returns one summary per record, in order.
+Rows rejected by preprocessing are never sent to the model. It runs the cache
+lookup, the optional tier-profile dedup and packed passes, and the concurrent
+single-candidate pass. The front ends only parse input, report progress
+through the `on_summary` callback, and write output.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+from batch import (
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_RPM,
+    DEFAULT_TPM,
+    RateLimiter,
+    estimate_tokens,
+    run_batch,
+)
+from dedup import group_by_profile, personalize, placeholder_candidate
+from gemini_client import MODEL_NAME, generate_summary_for_candidate
+from knowledge_base import SCORE_KEYS, build_prompt
+from packing import (
+    DEFAULT_PACK_SIZE,
+    build_packed_prompt_parts,
+    generate_packed_summaries,
+    make_packs,
+)
+from result_cache import cache_key
+from telemetry import TELEMETRY_COLUMNS, CandidateMetrics
+from validator import format_validation, validate_summary
+
+REQUIRED_COLUMNS = ['Name', 'Gender', 'Type'] + SCORE_KEYS
+SUMMARY_COLUMN = 'AI Executive Summary'
+VALIDATION_COLUMN = 'Validation'
+FIRST_TOKEN_COLUMN = 'Time to First Token (s)'
+
+
+@dataclass
+class GenerationOptions:
+    """Every setting that affects how summaries are generated for a run."""
+    slim: bool = True
+    max_examples: int = 2
+    packed: bool = False
+    pack_size: int = DEFAULT_PACK_SIZE
+    max_workers: int = DEFAULT_MAX_WORKERS
+    rpm: int = DEFAULT_RPM
+    tpm: int = DEFAULT_TPM
+    max_retries: int = DEFAULT_MAX_RETRIES
+    use_context_cache: bool = True
+    model_name: str = MODEL_NAME
+    validate: bool = True
+    max_regenerations: int = 2
+    stream: bool = False
+    dedup: bool = False
+    use_result_cache: bool = True  # serve and store summaries in the result cache, and resume journaled rows
+
+    def prompt_settings(self):
+        """The settings that change the prompt text, and therefore the result-cache key."""
+        return {'slim': self.slim, 'max_examples': self.max_examples if self.slim else None}
+
+    def rate_limiter(self):
+        return RateLimiter(rpm=self.rpm, tpm=self.tpm)
+
+
+@dataclass
+class GenerationResult:
+    """Summaries in input order, with failures recorded as error text and in `errors`."""
+    summaries: list
+    errors: dict = field(default_factory=dict)  # row index -> exception
+    rejected: dict = field(default_factory=dict)  # row index -> reasons the row failed preprocessing
+    cache_hits: int = 0
+    resumed: int = 0
+    validation: list = None  # per row: list of failed rules, or None if not validated
+    regenerated: int = 0
+    deduplicated: int = 0  # rows personalized from a shared tier-profile generation
+    dedup_groups: int = 0  # shared generations those rows came from
+    calls: int = 0  # API responses received; a pack or dedup group is one call
+    attempts: int = 0  # API attempts, including failed ones, counted the same way
+    first_token_latency: list = None  # per row, seconds; None where the row was not streamed
+    metrics: list = None  # per row CandidateMetrics; None where the row came from the cache or journal
+
+    def validation_column(self):
+        """Per-row text for the validation column: Pass, Fail with reasons, or blank."""
+        if self.validation is None:
+            return [None] * len(self.summaries)
+        return [
+            "Not generated" if index in self.errors or index in self.rejected else format_validation(reasons)
+            for index, reasons in enumerate(self.validation)
+        ]
+
+    def first_token_column(self):
+        """Per-row time to first token in seconds, rounded for the results sheet."""
+        return [None if value is None else round(value, 3) for value in self.first_token_latency]
+
+    def telemetry_columns(self, model_name):
+        """{column name: per-row values} for the optional telemetry columns; blank for rows not generated."""
+        columns = {column: [] for column in TELEMETRY_COLUMNS}
+        for metrics in self.metrics:
+            values = metrics.columns(model_name) if metrics is not None else {}
+            for column in TELEMETRY_COLUMNS:
+                columns[column].append(values.get(column))
+        return columns
+
+
+def missing_columns(columns):
+    """Returns the required columns absent from `columns`, in template order."""
+    present = set(columns)
+    return [column for column in REQUIRED_COLUMNS if column not in present]
+
+
+def format_error(error):
+    """The text written into the results column when a candidate could not be generated."""
+    return f"Error: Could not generate summary. Details: {error}"
+
+
+def format_rejection(reasons):
+    """The text written into the results column for a row that failed preprocessing."""
+    return f"Rejected: {reasons}"
+
+
+def generate_summaries(candidates, session, options, result_cache=None, rate_limiter=None, on_summary=None,
+                       journal=None, job_id=None, row_offset=0, on_text=None, on_tick=None, rejected=None,
+                       resume=True):
+    """
+    Generates a summary for every candidate.
+
+    Args:
+        candidates (list[dict]): Candidate records from `preprocess.prepare_candidates`,
+            with None in place of each rejected row.
+        session (GeminiSession): The shared session for this run.
+        options (GenerationOptions): Prompt, packing and throughput settings.
+        result_cache (ResultCache): Serve and store summaries here when given.
+        rate_limiter (RateLimiter): Share one limiter across calls (e.g. per chunk
+            in the CLI); a fresh one is built from `options` otherwise.
+        on_summary: Called on the calling thread as `on_summary(index, summary)`
+            each time a candidate finishes, including cache hits and failures
+            (which receive the error text).
+        journal (JobJournal): Skip rows this job already completed and persist
+            every outcome as soon as it arrives. The rows must already be registered
+            with `journal.add_rows`.
+        job_id (str): The job the candidates belong to.
+        row_offset (int): Journal row index of `candidates[0]`, for chunked input.
+        on_text: With `options.stream`, called from worker threads as
+            `on_text(index, text_so_far)` while a candidate's response streams in.
+        on_tick: Called on the calling thread a few times a second while requests
+            are in flight, so a UI can render what `on_text` collected.
+        rejected (dict): {row index: reasons} for rows that failed preprocessing. They
+            are reported through `on_summary` and the journal but never generated.
+        resume (bool): Serve rows the journal already completed. When False, every row
+            is generated again and its journal entry overwritten, e.g. when the caller
+            has turned result reuse off.
+
+    Returns:
+        GenerationResult
+    """
+    total = len(candidates)
+    summaries = [None] * total
+    rate_limiter = rate_limiter or options.rate_limiter()
+    keys = [
+        cache_key(c, options.model_name, options.prompt_settings()) if c is not None else None for c in candidates
+    ]
+    rejected = rejected or {}
+
+    validation = [None] * total
+    metrics = [None] * total
+
+    def row_metrics(index):
+        # Each row is only ever touched by one worker at a time, then by the calling thread
+        if metrics[index] is None:
+            metrics[index] = CandidateMetrics()
+        return metrics[index]
+
+    calls = attempts = 0
+    calls_lock = threading.Lock()
+
+    def add_attempts(indices, result):
+        # Every row a request served shows its attempts; the run counts them once
+        nonlocal attempts
+        attempts += result.attempts
+        for index in indices:
+            row_metrics(index).add_attempts(result.attempts, result.elapsed)
+
+    def add_usage(indices, usage):
+        # Runs on worker threads. A response shared by several rows (a pack or a dedup
+        # group) is one call, and its usage is split evenly across them
+        nonlocal calls
+        with calls_lock:
+            calls += 1
+        for index in indices:
+            row_metrics(index).add_usage(usage, share=1 / len(indices))
+
+    def record(index, summary, store=True, error=None, journaled=False, notify=True):
+        summaries[index] = summary
+        if error is None and options.validate:
+            validation[index] = validate_summary(summary, candidates[index])
+        # Only summaries that pass validation are reused from the cache
+        if store and error is None and result_cache is not None and not validation[index]:
+            result_cache.put(keys[index], summary)
+        if journal is not None and not journaled:
+            journal.record(job_id, row_offset + index, summary, error=error)
+        if notify and on_summary is not None:
+            on_summary(index, summary)
+
+    for index, reasons in rejected.items():
+        record(index, format_rejection(reasons), store=False, error=ValueError(reasons))
+
+    resumed = 0
+    if journal is not None and resume:
+        for row_index, summary in journal.completed(job_id, row_offset, row_offset + total).items():
+            if row_index - row_offset in rejected:
+                continue
+            resumed += 1
+            record(row_index - row_offset, summary, store=False, journaled=True)
+
+    cache_hits = 0
+    if result_cache is not None:
+        lookup = [i for i in range(total) if summaries[i] is None]
+        cached = result_cache.get_many([keys[i] for i in lookup])
+        for index in lookup:
+            key = keys[index]
+            if key in cached:
+                cache_hits += 1
+                record(index, cached[key], store=False)
+    pending = [i for i in range(total) if summaries[i] is None]
+
+    deduplicated = dedup_groups = 0
+    if options.dedup and pending:
+        # One generation per tier profile, personalized locally for each member.
+        # Groups that fail fall through to the passes below.
+        groups = group_by_profile(candidates, pending)
+
+        def generate_group(members):
+            summary = generate_summary_for_candidate(
+                session, placeholder_candidate(candidates[members[0]]), slim=options.slim,
+                max_examples=options.max_examples, on_usage=lambda usage: add_usage(members, usage),
+            )
+            return [personalize(summary, candidates[index]) for index in members]
+
+        def on_group_complete(done, count, result):
+            nonlocal deduplicated, dedup_groups
+            members = groups[result.index]
+            add_attempts(members, result)
+            if result.ok:
+                dedup_groups += 1
+                deduplicated += len(members)
+                for index, summary in zip(members, result.value):
+                    record(index, summary)
+
+        run_batch(
+            groups,
+            generate_group,
+            max_workers=options.max_workers,
+            rate_limiter=rate_limiter,
+            token_estimator=lambda members: estimate_tokens(build_prompt(
+                placeholder_candidate(candidates[members[0]]), slim=options.slim, max_examples=options.max_examples
+            )),
+            max_retries=options.max_retries,
+            on_complete=on_group_complete,
+            on_tick=on_tick,
+        )
+        pending = [i for i in pending if summaries[i] is None]
+
+    if options.packed and pending:
+        # Packed pass first; anything it does not resolve falls through to single mode
+        packs = make_packs(pending, options.pack_size)
+
+        def on_pack_complete(done, count, result):
+            add_attempts(packs[result.index], result)
+            if result.ok:
+                for position, summary in result.value.items():
+                    record(packs[result.index][position], summary)
+
+        run_batch(
+            packs,
+            lambda pack: generate_packed_summaries(
+                session, [candidates[i] for i in pack], slim=options.slim, max_examples=options.max_examples,
+                on_usage=lambda usage: add_usage(pack, usage),
+            ),
+            max_workers=options.max_workers,
+            rate_limiter=rate_limiter,
+            token_estimator=lambda pack: estimate_tokens("".join(build_packed_prompt_parts(
+                [candidates[i] for i in pack], slim=options.slim, max_examples=options.max_examples
+            ))),
+            max_retries=options.max_retries,
+            on_complete=on_pack_complete,
+            on_tick=on_tick,
+        )
+        pending = [i for i in pending if summaries[i] is None]
+
+    errors = {}
+
+    def on_complete(done, count, result):
+        add_attempts([pending[result.index]], result)
+        if result.ok:
+            record(pending[result.index], result.value)
+        else:
+            errors[pending[result.index]] = result.error
+            record(pending[result.index], format_error(result.error), error=result.error)
+
+    first_token_latency = [None] * total
+
+    def generate_one(index):
+        on_usage = lambda usage: add_usage([index], usage)
+        if not options.stream:
+            return generate_summary_for_candidate(
+                session, candidates[index], slim=options.slim, max_examples=options.max_examples, on_usage=on_usage
+            )
+        # Measured per attempt, so a retried row reports its successful attempt
+        started = time.perf_counter()
+        first_token_latency[index] = None
+
+        def on_chunk(text):
+            if first_token_latency[index] is None:
+                first_token_latency[index] = time.perf_counter() - started
+            if on_text is not None:
+                on_text(index, text)
+
+        return generate_summary_for_candidate(
+            session, candidates[index], slim=options.slim, max_examples=options.max_examples, on_text=on_chunk,
+            on_usage=on_usage,
+        )
+
+    run_batch(
+        pending,
+        generate_one,
+        max_workers=options.max_workers,
+        rate_limiter=rate_limiter,
+        token_estimator=lambda index: estimate_tokens(
+            build_prompt(candidates[index], slim=options.slim, max_examples=options.max_examples)
+        ),
+        max_retries=options.max_retries,
+        on_complete=on_complete,
+        on_tick=on_tick,
+    )
+
+    # Regenerate only candidates that fail local validation, up to the retry budget
+    regenerated = 0
+    for _ in range(options.max_regenerations if options.validate else 0):
+        failing = [i for i in range(total) if i not in errors and validation[i]]
+        if not failing:
+            break
+        regenerated += len(failing)
+
+        def on_regenerated(done, count, result):
+            # Keep whichever draft breaks fewer rules
+            index = failing[result.index]
+            add_attempts([index], result)
+            if result.ok and len(validate_summary(result.value, candidates[index])) <= len(validation[index]):
+                record(index, result.value, notify=False)
+
+        run_batch(
+            failing,
+            lambda i: generate_summary_for_candidate(
+                session, candidates[i], slim=options.slim, max_examples=options.max_examples,
+                feedback=validation[i], on_usage=lambda usage: add_usage([i], usage),
+            ),
+            max_workers=options.max_workers,
+            rate_limiter=rate_limiter,
+            token_estimator=lambda i: estimate_tokens(
+                build_prompt(candidates[i], slim=options.slim, max_examples=options.max_examples)
+            ),
+            max_retries=options.max_retries,
+            on_complete=on_regenerated,
+            on_tick=on_tick,
+        )
+
+    return GenerationResult(
+        summaries=summaries, errors=errors, rejected=rejected, cache_hits=cache_hits, resumed=resumed,
+        validation=validation if options.validate else None, regenerated=regenerated,
+        deduplicated=deduplicated, dedup_groups=dedup_groups, calls=calls, attempts=attempts,
+        first_token_latency=first_token_latency, metrics=metrics,
+    )
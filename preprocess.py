@@ -0,0 +1,182 @@
+"""
+Whole-frame validation and scoring of candidate rows before any API call.
+
+`prepare_candidates` checks every row of an input DataFrame at once with
+pandas and NumPy. It coerces the score columns to numbers and enforces the
+1.0-5.0 range. It checks the assessment type and requires a name and gender.
+For the rows that pass, it precomputes what the prompt needs: the pronoun,
+the High/Moderate/Low tier of every score (Part 3.4 cut-offs), and the two
+highest- and two lowest-scoring core competencies for the bullet points.
+Problems are collected into one report, so bad rows are skipped before
+anything is spent on them rather than failing mid-run.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from knowledge_base import (
+    ASSESSMENT_TYPES,
+    CORE_COMPETENCIES,
+    HIGH_CUTOFF,
+    MODERATE_CUTOFF,
+    SCORE_KEYS,
+)
+
+MIN_SCORE = 1.0
+MAX_SCORE = 5.0
+
+REJECTED = 'Rejected'
+FLAGGED = 'Flagged'
+ISSUE_COLUMNS = ['Row', 'Name', 'Severity', 'Column', 'Problem']
+
+FEMALE_VALUES = {'F', 'FEMALE'}
+MALE_VALUES = {'M', 'MALE'}
+
+
+@dataclass
+class PreparedBatch:
+    """
+    Candidate records for the rows of a DataFrame, plus every problem found.
+
+    `candidates` has one entry per input row, in order: the precomputed record,
+    or None for a rejected row. `issues` holds one report line per problem.
+    """
+    candidates: list
+    issues: pd.DataFrame
+    rejections: dict  # row position -> reasons, joined for the results sheet
+
+    @property
+    def accepted(self):
+        return [i for i, candidate in enumerate(self.candidates) if candidate is not None]
+
+    @property
+    def flagged(self):
+        return int((self.issues['Severity'] == FLAGGED).sum())
+
+
+def _text(series):
+    """Stripped string values, with missing values as empty strings."""
+    return series.astype('string').str.strip().fillna('')
+
+
+def score_tiers(scores):
+    """Vectorized Part 3.4 tiers for an array of scores."""
+    return np.select([scores >= HIGH_CUTOFF, scores >= MODERATE_CUTOFF], ['High', 'Moderate'], 'Low')
+
+
+def rank_competencies(scores):
+    """
+    Picks the two highest- and two lowest-scoring core competencies per row.
+
+    Ties are broken deterministically: strengths prefer earlier competencies in
+    template order and development areas prefer later ones, so the two picks
+    stay distinct when scores are level. Any competency tied with a second pick
+    but left out is returned as well, so the prompt can let the model choose
+    among them as Part 3.4 allows. A competency picked for the other side is
+    never offered as a tie, so a strength cannot also be a development area.
+
+    Args:
+        scores (np.ndarray): (rows, len(CORE_COMPETENCIES)) core competency scores.
+
+    Returns:
+        tuple: (top indices, bottom indices, top tie mask, bottom tie mask), each with one row per input row.
+    """
+    top = np.argsort(-scores, axis=1, kind='stable')[:, :2]
+    bottom = scores.shape[1] - 1 - np.argsort(scores[:, ::-1], axis=1, kind='stable')[:, :2]
+    rows = np.arange(len(scores))[:, None]
+    top_selected = np.zeros(scores.shape, dtype=bool)
+    top_selected[rows, top] = True
+    bottom_selected = np.zeros(scores.shape, dtype=bool)
+    bottom_selected[rows, bottom] = True
+    top_ties = (scores == scores[rows, top[:, 1:]]) & ~top_selected & ~bottom_selected
+    bottom_ties = (scores == scores[rows, bottom[:, 1:]]) & ~bottom_selected & ~top_selected
+    return top, bottom, top_ties, bottom_ties
+
+
+def prepare_candidates(df, row_offset=0):
+    """
+    Validates every row of `df` and builds candidate records for the ones that pass.
+
+    Args:
+        df (pd.DataFrame): Rows in the template format. Required columns must be present.
+        row_offset (int): Rows before `df` in the source, for the spreadsheet row
+            numbers in the report (e.g. when the CLI reads in chunks).
+
+    Returns:
+        PreparedBatch
+    """
+    df = df.reset_index(drop=True)
+    names = _text(df['Name'])
+    raw_scores = df[SCORE_KEYS]
+    scores_frame = raw_scores.apply(pd.to_numeric, errors='coerce')
+    scores = scores_frame.to_numpy(dtype=float)
+    blank_scores = raw_scores.apply(lambda column: _text(column).eq('')).to_numpy(dtype=bool)
+
+    gender = _text(df['Gender']).str.upper()
+    assessment_type = _text(df['Type']).str.capitalize()
+
+    issues = []
+
+    def report(mask, severity, column, problem):
+        for position in np.flatnonzero(mask):
+            issues.append((int(position), severity, column, problem(position)))
+
+    report(names.eq('').to_numpy(), REJECTED, 'Name', lambda i: "Name is blank")
+    report(gender.eq('').to_numpy(), REJECTED, 'Gender', lambda i: "Gender is blank")
+    report(
+        (~gender.eq('') & ~gender.isin(FEMALE_VALUES | MALE_VALUES)).to_numpy(), FLAGGED, 'Gender',
+        lambda i: f"Gender '{df['Gender'].iat[i]}' is not M or F; using He/His",
+    )
+    report(
+        (~assessment_type.isin(ASSESSMENT_TYPES)).to_numpy(), REJECTED, 'Type',
+        lambda i: f"Type '{df['Type'].iat[i]}' is not one of {', '.join(ASSESSMENT_TYPES)}"
+        if assessment_type.iat[i] else "Type is blank",
+    )
+    missing = np.isnan(scores)
+    out_of_range = ~missing & ((scores < MIN_SCORE) | (scores > MAX_SCORE))
+    for column, key in enumerate(SCORE_KEYS):
+        report(missing[:, column] & blank_scores[:, column], REJECTED, key, lambda i, key=key: f"{key} is blank")
+        report(
+            missing[:, column] & ~blank_scores[:, column], REJECTED, key,
+            lambda i, key=key: f"{key} '{raw_scores[key].iat[i]}' is not a number",
+        )
+        report(
+            out_of_range[:, column], REJECTED, key,
+            lambda i, key=key, column=column: f"{key} {scores[i, column]:g} is outside {MIN_SCORE}-{MAX_SCORE}",
+        )
+
+    issues.sort(key=lambda issue: issue[0])
+    report_frame = pd.DataFrame(
+        [(row_offset + i + 2, names.iat[i], severity, column, problem) for i, severity, column, problem in issues],
+        columns=ISSUE_COLUMNS,
+    )
+    rejections = {}
+    for i, severity, _, problem in issues:
+        if severity == REJECTED:
+            rejections[i] = f"{rejections[i]}; {problem}" if i in rejections else problem
+
+    # Precompute everything the prompt needs, for all rows at once
+    tiers = score_tiers(scores)
+    core = scores[:, [SCORE_KEYS.index(key) for key in CORE_COMPETENCIES]]
+    top, bottom, top_ties, bottom_ties = rank_competencies(np.nan_to_num(core))
+    pronouns = np.where(gender.isin(FEMALE_VALUES).to_numpy(), "She/Her", "He/His")
+    competencies = np.array(CORE_COMPETENCIES)
+
+    candidates = []
+    for i in range(len(df)):
+        if i in rejections:
+            candidates.append(None)
+            continue
+        candidates.append({
+            'name': names.iat[i],
+            'pronoun': str(pronouns[i]),
+            'assessment_type': assessment_type.iat[i],
+            'scores': dict(zip(SCORE_KEYS, scores[i].tolist())),
+            'tiers': dict(zip(SCORE_KEYS, tiers[i].tolist())),
+            'strengths': competencies[top[i]].tolist(),
+            'development_areas': competencies[bottom[i]].tolist(),
+            'strength_ties': competencies[top_ties[i]].tolist(),
+            'development_ties': competencies[bottom_ties[i]].tolist(),
+        })
+    return PreparedBatch(candidates=candidates, issues=report_frame, rejections=rejections)
@@ -0,0 +1,170 @@
+"""
+Persistent, content-addressed cache of generated summaries.
+
+Each summary is stored under a hash of everything that determines it: the
+prompt/knowledge-base version, the model name, the prompt settings and the
+normalized candidate input (name, pronoun, assessment type and the eight
+scores). Re-uploading a workbook therefore only bills rows that actually
+changed, and editing DEFINITIVE_PROMPT or bumping PROMPT_TEMPLATE_VERSION
+changes PROMPT_VERSION, which invalidates every earlier entry.
+
+The store is a single SQLite file. Entries past `max_age` are evicted, and
+the least recently used entries go once the total size exceeds `max_bytes`.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from knowledge_base import PROMPT_VERSION, SCORE_KEYS, normalize_assessment_type
+from sqlite_store import connect
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'SUMMARY_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'executive-summary', 'results.sqlite3'),
+)
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def normalize_candidate(candidate):
+    """Returns the canonical form of a candidate record so cosmetic differences share a key."""
+    try:
+        assessment_type = normalize_assessment_type(candidate['assessment_type'])
+    except ValueError:
+        assessment_type = str(candidate['assessment_type']).strip()
+    return {
+        'name': " ".join(str(candidate['name']).split()),
+        'pronoun': str(candidate['pronoun']).strip(),
+        'assessment_type': assessment_type,
+        'scores': {key: round(float(candidate['scores'][key]), 6) for key in SCORE_KEYS},
+    }
+
+
+def cache_key(candidate, model_name, settings=None, prompt_version=PROMPT_VERSION):
+    """
+    Hashes everything that determines a candidate's summary.
+
+    Args:
+        candidate (dict): {'name', 'pronoun', 'assessment_type', 'scores'}.
+        model_name (str): The Gemini model used.
+        settings (dict): Any prompt options that change the request, e.g. slim mode.
+        prompt_version (str): Version of the prompt and knowledge base.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    payload = {
+        'prompt_version': prompt_version,
+        'model': model_name,
+        'settings': settings or {},
+        'candidate': normalize_candidate(candidate),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-backed summary cache with age- and size-based eviction.
+
+    Safe to share across threads; each operation uses its own connection.
+    `hits` and `misses` count lookups since the cache was created.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+
+    def get_many(self, keys):
+        """Returns {key: summary} for every key present and not expired, updating hit/miss counts."""
+        keys = list(keys)
+        found = {}
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            # SQLite limits the number of bound parameters per statement.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, summary FROM results WHERE key IN ({placeholders}) AND created_at >= ?",
+                    chunk + [now - self.max_age],
+                ).fetchall()
+                found.update(rows)
+                conn.execute(
+                    f"UPDATE results SET accessed_at = ? WHERE key IN ({placeholders})",
+                    [now] + chunk,
+                )
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def get(self, key):
+        """Returns the cached summary for `key`, or None."""
+        return self.get_many([key]).get(key)
+
+    def put(self, key, summary, prompt_version=PROMPT_VERSION):
+        """Stores a summary. Only successful generations should be cached."""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, summary, prompt_version, len(summary.encode('utf-8')), now, now),
+            )
+
+    def evict(self):
+        """Drops expired entries, then least recently used ones until under `max_bytes`. Returns rows removed."""
+        with self._lock, connect(self.path) as conn:
+            removed = conn.execute(
+                "DELETE FROM results WHERE created_at < ?", (time.time() - self.max_age,)
+            ).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed_at"):
+                    if excess <= 0:
+                        break
+                    victims.append((key,))
+                    excess -= size
+                conn.executemany("DELETE FROM results WHERE key = ?", victims)
+                removed += len(victims)
+        return removed
+
+    def invalidate(self, prompt_version=None):
+        """Deletes every entry, or only those written under `prompt_version`. Returns rows removed."""
+        with self._lock, connect(self.path) as conn:
+            if prompt_version is None:
+                return conn.execute("DELETE FROM results").rowcount
+            return conn.execute("DELETE FROM results WHERE prompt_version = ?", (prompt_version,)).rowcount
+
+    def invalidate_stale(self):
+        """Deletes entries written under any prompt version other than the current one."""
+        with self._lock, connect(self.path) as conn:
+            return conn.execute("DELETE FROM results WHERE prompt_version != ?", (PROMPT_VERSION,)).rowcount
+
+    def stats(self):
+        """Returns {'entries', 'bytes', 'hits', 'misses'}."""
+        with self._lock, connect(self.path) as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
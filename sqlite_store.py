@@ -0,0 +1,30 @@
+"""
+Helpers shared by the SQLite-backed stores: the result cache, the job journal
+and the task queue.
+
+Each store opens a short-lived connection per operation through `connect`,
+so one store object is safe to share across threads and processes on one
+host. The files use WAL mode, which needs a local disk: never put them on a
+network filesystem shared between machines.
+"""
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path):
+    """Yields a connection to `path` that commits on success and is always closed."""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def json_default(value):
+    """`json.dumps` fallback for input rows: numpy scalars (from pandas) become plain values, anything else text."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
@@ -0,0 +1,339 @@
+"""
+Durable SQLite work queue for running generation jobs across worker processes.
+
+A front end submits an uploaded workbook as a job: every row becomes a task
+that carries its precomputed candidate record, and the job stores the
+generation options. Any number of worker processes (worker.py) claim tasks
+in small batches, generate them and post the results back. The submitter only
+polls progress and assembles the results workbook once the job is complete.
+
+The queue serves one host. SQLite's WAL mode and the write lock a claim takes
+are unreliable on network filesystems, so the database file must sit on a
+local disk, and every submitter and worker must run on the machine that
+holds it. The queue records the host that created it and refuses to open
+anywhere else. Containers on one machine see different host names; they
+can share a queue by setting SUMMARY_QUEUE_HOST to the same value.
+
+Tasks are claimed round-robin across jobs (row 0 of every job, then row 1,
+and so on), so a large job cannot starve a small one submitted after it.
+A claim is a lease: a worker that dies without posting loses its tasks when
+the lease expires, and another worker picks them up.
+"""
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict
+
+from excel_io import StreamingResultWriter
+from knowledge_base import PROMPT_VERSION
+from sqlite_store import connect, json_default
+
+DEFAULT_QUEUE_PATH = os.environ.get(
+    'SUMMARY_QUEUE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'executive-summary', 'queue.sqlite3'),
+)
+DEFAULT_QUEUE_HOST = os.environ.get('SUMMARY_QUEUE_HOST', socket.gethostname())
+DEFAULT_LEASE = 600.0  # seconds a claimed task stays with its worker without a heartbeat
+
+# Throughput settings: workers run with their own, so they never change a job's results
+THROUGHPUT_OPTIONS = ('max_workers', 'rpm', 'tpm', 'max_retries', 'use_context_cache')
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_REJECTED = 'rejected'
+
+
+def queue_job_id(digest, options):
+    """
+    Job id for an input file digest, the prompt version and every option that changes the results.
+
+    Unlike the journal's job id, this also covers packing, dedup, validation, streaming and
+    the result cache, because the job stores them for the workers: a resubmission with any
+    of them changed is a new job. THROUGHPUT_OPTIONS are left out, so changing only e.g.
+    the concurrency shows the existing job rather than queueing the same work again.
+    """
+    settings = {key: value for key, value in asdict(options).items() if key not in THROUGHPUT_OPTIONS}
+    settings.update(options.prompt_settings())
+    payload = json.dumps(
+        {'input': digest, 'prompt_version': PROMPT_VERSION, 'options': settings},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class TaskQueue:
+    """
+    SQLite-backed queue of jobs and their row tasks.
+
+    Safe to share across threads and processes on one host; each operation uses
+    its own connection, and claims run in an immediate (write-locked) transaction.
+
+    Raises:
+        RuntimeError: If the queue at `path` was created by another host.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, host=DEFAULT_QUEUE_HOST):
+        self.path = path
+        self.host = host
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with connect(self.path) as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS queue_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    source TEXT,
+                    columns TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    submitted_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS queue_tasks (
+                    job_id TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    candidate TEXT,
+                    status TEXT NOT NULL,
+                    worker TEXT,
+                    lease_expires REAL,
+                    summary TEXT,
+                    error TEXT,
+                    result TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, row_index)
+                );
+                CREATE INDEX IF NOT EXISTS queue_tasks_claim ON queue_tasks (status, row_index);
+                CREATE TABLE IF NOT EXISTS queue_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute("INSERT OR IGNORE INTO queue_meta VALUES ('host', ?)", (host,))
+            owner = conn.execute("SELECT value FROM queue_meta WHERE key = 'host'").fetchone()[0]
+        if owner != host:
+            raise RuntimeError(
+                f"The queue at {path} belongs to host {owner!r}, not {host!r}. SQLite queues cannot be "
+                "shared between machines; run this process on that host or use a queue on a local disk."
+            )
+
+    # --------------------------------------------------------------------------
+    # Submitting and tracking jobs
+    # --------------------------------------------------------------------------
+
+    def submit(self, job_id, options, columns, rows, candidates, rejections=None, source=None):
+        """
+        Queues a job. Submitting a job id that already exists leaves it untouched.
+
+        Args:
+            job_id (str): From `queue_job_id`, so the same upload and settings share a job.
+            options (GenerationOptions): Settings the workers generate with.
+            columns (list[str]): Input column names, for the results workbook.
+            rows (list[dict]): Input rows (header->value dicts).
+            candidates (list[dict]): `preprocess.prepare_candidates` records, None for rejected rows.
+            rejections (dict): {row index: reasons}; these rows are stored as already finished.
+            source (str): Original file name, for display.
+
+        Returns:
+            bool: True if the job was created.
+        """
+        rejections = rejections or {}
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            created = conn.execute(
+                "INSERT OR IGNORE INTO queue_jobs VALUES (?, ?, ?, ?, ?)",
+                (job_id, source, json.dumps(list(columns)), json.dumps(asdict(options)), now),
+            ).rowcount
+            if created:
+                conn.executemany(
+                    "INSERT INTO queue_tasks (job_id, row_index, data, candidate, status, error, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            job_id, index, json.dumps(row, default=json_default),
+                            json.dumps(candidate) if candidate is not None else None,
+                            STATUS_REJECTED if index in rejections else STATUS_PENDING,
+                            rejections.get(index), now,
+                        )
+                        for index, (row, candidate) in enumerate(zip(rows, candidates))
+                    ],
+                )
+        return bool(created)
+
+    def progress(self, job_id):
+        """Returns {'total', 'pending', 'running', 'done', 'failed', 'rejected'} task counts for a job."""
+        with self._lock, connect(self.path) as conn:
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM queue_tasks WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        statuses = [STATUS_PENDING, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED, STATUS_REJECTED]
+        progress = {status: counts.get(status, 0) for status in statuses}
+        progress['total'] = sum(progress.values())
+        return progress
+
+    def is_finished(self, job_id):
+        progress = self.progress(job_id)
+        return progress['total'] > 0 and not progress[STATUS_PENDING] and not progress[STATUS_RUNNING]
+
+    def jobs(self):
+        """Yields (job id, source, submitted_at, progress) for every job, newest first."""
+        with self._lock, connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT job_id, source, submitted_at FROM queue_jobs ORDER BY submitted_at DESC"
+            ).fetchall()
+        for job_id, source, submitted_at in rows:
+            yield job_id, source, submitted_at, self.progress(job_id)
+
+    def options(self, job_id):
+        """The job's generation options as a dict, or None if the job is unknown."""
+        with self._lock, connect(self.path) as conn:
+            row = conn.execute("SELECT options FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def retry_failed(self, job_id):
+        """Puts a job's failed tasks back in the queue. Returns how many were requeued."""
+        with self._lock, connect(self.path) as conn:
+            return conn.execute(
+                "UPDATE queue_tasks SET status = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = ?",
+                (STATUS_PENDING, time.time(), job_id, STATUS_FAILED),
+            ).rowcount
+
+    def delete_job(self, job_id):
+        with self._lock, connect(self.path) as conn:
+            conn.execute("DELETE FROM queue_tasks WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM queue_jobs WHERE job_id = ?", (job_id,))
+
+    # --------------------------------------------------------------------------
+    # Worker side
+    # --------------------------------------------------------------------------
+
+    def claim(self, worker_id, limit=16, lease=DEFAULT_LEASE):
+        """
+        Leases up to `limit` runnable tasks to a worker.
+
+        Pending tasks and tasks whose lease has expired are runnable. They are
+        taken in row order across all jobs, so every job makes progress.
+
+        Returns:
+            list[dict]: {'job_id', 'row_index', 'candidate', 'options'} per claimed task.
+        """
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            claimed = conn.execute(
+                """
+                SELECT t.job_id, t.row_index, t.candidate, j.options
+                FROM queue_tasks t JOIN queue_jobs j ON j.job_id = t.job_id
+                WHERE t.status = ? OR (t.status = ? AND t.lease_expires < ?)
+                ORDER BY t.row_index, j.submitted_at
+                LIMIT ?
+                """,
+                (STATUS_PENDING, STATUS_RUNNING, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE queue_tasks SET status = ?, worker = ?, lease_expires = ?, updated_at = ? "
+                "WHERE job_id = ? AND row_index = ?",
+                [(STATUS_RUNNING, worker_id, now + lease, now, job_id, row_index) for job_id, row_index, _, _ in claimed],
+            )
+        return [
+            {'job_id': job_id, 'row_index': row_index, 'candidate': json.loads(candidate), 'options': json.loads(options)}
+            for job_id, row_index, candidate, options in claimed
+        ]
+
+    def heartbeat(self, worker_id, lease=DEFAULT_LEASE):
+        """Extends the lease on every task the worker is still running."""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "UPDATE queue_tasks SET lease_expires = ? WHERE worker = ? AND status = ?",
+                (now + lease, worker_id, STATUS_RUNNING),
+            )
+
+    def release(self, worker_id):
+        """Returns a worker's unfinished tasks to the queue, e.g. when it shuts down."""
+        with self._lock, connect(self.path) as conn:
+            return conn.execute(
+                "UPDATE queue_tasks SET status = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE worker = ? AND status = ?",
+                (STATUS_PENDING, time.time(), worker_id, STATUS_RUNNING),
+            ).rowcount
+
+    def complete(self, worker_id, job_id, row_index, summary, error=None, result=None):
+        """
+        Posts one task's outcome.
+
+        Ignored if the task's lease has passed to another worker in the meantime.
+
+        Args:
+            summary (str): The summary, or the error text written to the results column.
+            error: The failure, if the task could not be generated.
+            result (dict): Extra per-row columns (validation, telemetry) for the results workbook.
+
+        Returns:
+            bool: True if the result was recorded.
+        """
+        with self._lock, connect(self.path) as conn:
+            return bool(conn.execute(
+                "UPDATE queue_tasks SET status = ?, summary = ?, error = ?, result = ?, worker = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE job_id = ? AND row_index = ? AND worker = ? AND status = ?",
+                (
+                    STATUS_FAILED if error is not None else STATUS_DONE, summary,
+                    None if error is None else str(error),
+                    json.dumps(result or {}, default=json_default), time.time(),
+                    job_id, row_index, worker_id, STATUS_RUNNING,
+                ),
+            ).rowcount)
+
+    # --------------------------------------------------------------------------
+    # Results
+    # --------------------------------------------------------------------------
+
+    def columns(self, job_id):
+        """The input column names of a job, or None if the job is unknown."""
+        with self._lock, connect(self.path) as conn:
+            row = conn.execute("SELECT columns FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_results(self, job_id):
+        """Yields (row index, input row dict, status, summary, extra columns dict) in row order."""
+        with self._lock, connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT row_index, data, status, summary, error, result FROM queue_tasks "
+                "WHERE job_id = ? ORDER BY row_index",
+                (job_id,),
+            ).fetchall()
+        for row_index, data, status, summary, error, result in rows:
+            if status == STATUS_REJECTED:
+                summary = f"Rejected: {error}"
+            yield row_index, json.loads(data), status, summary, json.loads(result) if result else {}
+
+
+def export_job(queue, job_id, output, summary_column, extra_columns=()):
+    """
+    Writes a job's rows, with their summaries and any extra result columns, to a results workbook.
+
+    Args:
+        queue (TaskQueue): The queue holding the job.
+        job_id (str): The job to export.
+        output: A file path or writable binary file object.
+        summary_column (str): Name of the summary column.
+        extra_columns (list[str]): Result columns to include when the workers recorded them.
+
+    Returns:
+        int: Number of rows written.
+    """
+    extra_columns = list(extra_columns)
+    output_columns = [summary_column] + extra_columns
+    columns = [c for c in (queue.columns(job_id) or []) if c and c not in output_columns] + output_columns
+    with StreamingResultWriter(output, columns) as writer:
+        for _, row, _, summary, result in queue.iter_results(job_id):
+            row[summary_column] = summary
+            for column in extra_columns:
+                row[column] = result.get(column)
+            writer.write(row)
+        return writer.rows_written
@@ -0,0 +1,188 @@
+"""
+Per-candidate telemetry and run-level metrics.
+
+Every generated row gets a `CandidateMetrics`. It records the wall time spent
+in API calls, the number of attempts, and the token counts reported in each
+response's `usage_metadata`, plus the estimated cost from list prices.
+`RunMetrics` aggregates results across a run (or across chunks in the CLI)
+into a JSON-serializable summary. Summaries from different prompt versions
+can be compared to catch regressions.
+"""
+import json
+import math
+import time
+from dataclasses import asdict, dataclass
+
+from knowledge_base import PROMPT_VERSION
+
+# USD per million tokens: (input, cached input, output). List prices for prompts
+# up to 200k tokens; update when pricing changes.
+PRICING = {
+    'gemini-2.5-pro': (1.25, 0.31, 10.00),
+    'gemini-2.5-flash': (0.30, 0.075, 2.50),
+}
+
+LATENCY_COLUMN = 'Generation Time (s)'
+ATTEMPTS_COLUMN = 'API Attempts'
+PROMPT_TOKENS_COLUMN = 'Prompt Tokens'
+CACHED_TOKENS_COLUMN = 'Cached Prompt Tokens'
+OUTPUT_TOKENS_COLUMN = 'Output Tokens'
+COST_COLUMN = 'Estimated Cost (USD)'
+TELEMETRY_COLUMNS = [
+    LATENCY_COLUMN, ATTEMPTS_COLUMN, PROMPT_TOKENS_COLUMN, CACHED_TOKENS_COLUMN, OUTPUT_TOKENS_COLUMN, COST_COLUMN,
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _count(usage, name):
+    return int(getattr(usage, name, 0) or 0)
+
+
+def estimate_cost(model_name, prompt_tokens, cached_tokens, output_tokens):
+    """Estimated USD cost of the given token counts, or None for a model without known pricing."""
+    prices = PRICING.get(model_name)
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    return (
+        (prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price + output_tokens * output_price
+    ) / 1_000_000
+
+
+@dataclass
+class CandidateMetrics:
+    """What one row cost to generate, summed over every call made for it."""
+    elapsed: float = 0.0
+    attempts: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+
+    def add_usage(self, usage, share=1.0):
+        """
+        Adds a response's `usage_metadata`.
+
+        `share` splits a response shared by several rows (a pack or a dedup group)
+        across them. API calls are counted per response, in `GenerationResult.calls`.
+        """
+        self.prompt_tokens += round(_count(usage, 'prompt_token_count') * share)
+        self.cached_tokens += round(_count(usage, 'cached_content_token_count') * share)
+        self.output_tokens += round(_count(usage, 'candidates_token_count') * share)
+
+    def add_attempts(self, attempts, elapsed):
+        self.attempts += attempts
+        self.elapsed += elapsed
+
+    def cost(self, model_name):
+        return estimate_cost(model_name, self.prompt_tokens, self.cached_tokens, self.output_tokens)
+
+    def columns(self, model_name):
+        """{column name: value} for the optional telemetry columns of the results sheet."""
+        cost = self.cost(model_name)
+        return {
+            LATENCY_COLUMN: round(self.elapsed, 3),
+            ATTEMPTS_COLUMN: self.attempts,
+            PROMPT_TOKENS_COLUMN: self.prompt_tokens,
+            CACHED_TOKENS_COLUMN: self.cached_tokens,
+            OUTPUT_TOKENS_COLUMN: self.output_tokens,
+            COST_COLUMN: None if cost is None else round(cost, 6),
+        }
+
+
+class RunMetrics:
+    """
+    Aggregates GenerationResults into run-level metrics.
+
+    Call `add` once per `generate_summaries` result (once per chunk in the CLI)
+    and `summary` at the end.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.cache_hits = 0
+        self.resumed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.regenerated = 0
+        self.deduplicated = 0
+        self.dedup_groups = 0
+        self.validation_failures = 0
+        self.calls = 0
+        self.attempts = 0
+        self.latencies = []
+        self.first_token = []
+        self.totals = CandidateMetrics()
+
+    def add(self, result):
+        self.rows += len(result.summaries)
+        self.cache_hits += result.cache_hits
+        self.resumed += result.resumed
+        self.failed += len(result.errors)
+        self.rejected += len(result.rejected)
+        self.regenerated += result.regenerated
+        self.deduplicated += result.deduplicated
+        self.dedup_groups += result.dedup_groups
+        if result.validation is not None:
+            self.validation_failures += sum(
+                1 for index, reasons in enumerate(result.validation) if reasons and index not in result.errors
+            )
+        self.first_token.extend(value for value in result.first_token_latency if value is not None)
+        # Counted per request, so a pack or dedup group shared by several rows counts once
+        self.calls += result.calls
+        self.attempts += result.attempts
+        for metrics in result.metrics:
+            if metrics is None:
+                continue
+            self.latencies.append(metrics.elapsed)
+            self.totals.prompt_tokens += metrics.prompt_tokens
+            self.totals.cached_tokens += metrics.cached_tokens
+            self.totals.output_tokens += metrics.output_tokens
+
+    def summary(self):
+        """The run's metrics as a JSON-serializable dict."""
+        seconds = time.perf_counter() - self.started
+        generated = len(self.latencies)
+        cost = self.totals.cost(self.options.model_name)
+        return {
+            'prompt_version': PROMPT_VERSION,
+            'model': self.options.model_name,
+            'options': asdict(self.options),
+            'rows': self.rows,
+            'generated': generated,
+            'cache_hits': self.cache_hits,
+            'resumed': self.resumed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'regenerated': self.regenerated,
+            'deduplicated': self.deduplicated,
+            'dedup_groups': self.dedup_groups,
+            'dedup_ratio': round(self.deduplicated / self.dedup_groups, 2) if self.dedup_groups else None,
+            'validation_failures': self.validation_failures,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.rows / seconds, 3) if seconds else None,
+            'latency_p50': percentile(self.latencies, 50),
+            'latency_p95': percentile(self.latencies, 95),
+            'latency_p99': percentile(self.latencies, 99),
+            'first_token_p50': percentile(self.first_token, 50),
+            'first_token_p95': percentile(self.first_token, 95),
+            'calls': self.calls,
+            'attempts': self.attempts,
+            'failed_attempts': self.attempts - self.calls,
+            'prompt_tokens': self.totals.prompt_tokens,
+            'cached_tokens': self.totals.cached_tokens,
+            'output_tokens': self.totals.output_tokens,
+            'estimated_cost_usd': None if cost is None else round(cost, 4),
+            'cost_per_row_usd': None if cost is None or not generated else round(cost / generated, 6),
+        }
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
@@ -0,0 +1,33 @@
+"""Shared fixtures: candidate rows in the template format and prepared candidate records."""
+import pandas as pd
+import pytest
+
+from knowledge_base import SCORE_KEYS
+from preprocess import prepare_candidates
+
+
+def candidate_row(name="Alex Doe", gender='M', assessment_type='Apply', scores=None):
+    """One input row in the template format; every score defaults to 3.0."""
+    row = {'Name': name, 'Gender': gender, 'Type': assessment_type}
+    row.update({key: 3.0 for key in SCORE_KEYS})
+    row.update(scores or {})
+    return row
+
+
+def spread_scores(start=1.5, step=0.4):
+    """Distinct scores across SCORE_KEYS, so tiers and competency ranks are unambiguous."""
+    return {key: round(start + step * i, 2) for i, key in enumerate(SCORE_KEYS)}
+
+
+@pytest.fixture
+def prepare():
+    """Builds prepared candidate records from row dicts."""
+    def _prepare(*rows):
+        return prepare_candidates(pd.DataFrame(list(rows)))
+    return _prepare
+
+
+@pytest.fixture
+def candidate(prepare):
+    """A valid prepared candidate with distinct scores."""
+    return prepare(candidate_row(scores=spread_scores())).candidates[0]
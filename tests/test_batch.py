@@ -0,0 +1,180 @@
+import threading
+import time
+
+import pytest
+
+from batch import RateLimiter, backoff_delay, is_retryable, run_batch
+
+
+class FakeClock:
+    """A monotonic clock that only moves when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def limiter(clock, **budgets):
+    return RateLimiter(clock=clock, sleep=clock.sleep, **budgets)
+
+
+# ==============================================================================
+# RATE LIMITING
+# ==============================================================================
+
+def test_rpm_waits_for_the_oldest_request_to_leave_the_window(clock):
+    rate_limiter = limiter(clock, rpm=2)
+    rate_limiter.acquire()
+    clock.now = 10.0
+    rate_limiter.acquire()
+    rate_limiter.acquire()
+    assert clock.sleeps == [50.0]
+
+
+def test_tpm_waits_until_enough_tokens_have_expired(clock):
+    rate_limiter = limiter(clock, tpm=1000)
+    rate_limiter.acquire(600)
+    clock.now = 20.0
+    rate_limiter.acquire(300)
+    rate_limiter.acquire(300)
+    # Only the first request has to expire for 300 more tokens to fit
+    assert clock.sleeps == [40.0]
+
+
+def test_oversized_request_is_admitted_on_an_empty_window(clock):
+    rate_limiter = limiter(clock, tpm=2000)
+    rate_limiter.acquire(3000)
+    assert clock.sleeps == []
+
+
+def test_oversized_request_waits_for_the_window_to_empty(clock):
+    rate_limiter = limiter(clock, tpm=2000)
+    rate_limiter.acquire(100)
+    clock.now = 5.0
+    rate_limiter.acquire(3000)
+    assert clock.sleeps == [55.0]
+    assert rate_limiter._tokens_in_window == 3000
+
+
+def test_no_budget_never_sleeps(clock):
+    rate_limiter = limiter(clock)
+    for _ in range(1000):
+        rate_limiter.acquire(10_000)
+    assert clock.sleeps == []
+
+
+# ==============================================================================
+# RETRIES
+# ==============================================================================
+
+@pytest.mark.parametrize('error, expected', [
+    (ApiError(429), True),
+    (ApiError(503), True),
+    (ApiError(400), False),
+    (TimeoutError(), True),
+    (ValueError("bad input"), False),
+    (type('ResourceExhausted', (Exception,), {})(), True),
+])
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(20):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=8.0) <= 8.0
+
+
+# ==============================================================================
+# BATCH EXECUTION
+# ==============================================================================
+
+def test_run_batch_returns_results_in_item_order():
+    # Later items finish first
+    results = run_batch(range(6), lambda i: time.sleep((6 - i) * 0.01) or i * 10, max_workers=6)
+    assert [result.index for result in results] == list(range(6))
+    assert [result.value for result in results] == [0, 10, 20, 30, 40, 50]
+    assert all(result.ok and result.attempts == 1 for result in results)
+
+
+def test_run_batch_retries_retryable_errors():
+    failures = {'a': 2, 'b': 0}
+    lock = threading.Lock()
+
+    def flaky(item):
+        with lock:
+            if failures[item]:
+                failures[item] -= 1
+                raise ApiError(503)
+        return item.upper()
+
+    results = run_batch(['a', 'b'], flaky, max_retries=3, sleep=lambda seconds: None)
+    assert [result.value for result in results] == ['A', 'B']
+    assert [result.attempts for result in results] == [3, 1]
+
+
+def test_run_batch_gives_up_after_max_retries():
+    def always_rate_limited(item):
+        raise ApiError(429)
+
+    result, = run_batch(['a'], always_rate_limited, max_retries=2, sleep=lambda seconds: None)
+    assert not result.ok
+    assert result.error.code == 429
+    assert result.attempts == 3
+
+
+def test_run_batch_does_not_retry_other_errors():
+    def invalid(item):
+        raise ValueError("bad request")
+
+    result, = run_batch(['a'], invalid, max_retries=5, sleep=lambda seconds: None)
+    assert isinstance(result.error, ValueError)
+    assert result.attempts == 1
+
+
+def test_run_batch_reports_completion_on_the_calling_thread():
+    caller = threading.get_ident()
+    seen = []
+
+    def on_complete(done, total, result):
+        seen.append((done, total, threading.get_ident() == caller))
+
+    run_batch(range(4), lambda i: i, max_workers=4, on_complete=on_complete)
+    assert sorted(seen) == [(1, 4, True), (2, 4, True), (3, 4, True), (4, 4, True)]
+
+
+def test_run_batch_checks_the_rate_limiter_before_every_attempt():
+    estimated = []
+
+    class CountingLimiter:
+        def acquire(self, tokens=0):
+            estimated.append(tokens)
+
+    attempts = {'count': 0}
+
+    def fails_once(item):
+        attempts['count'] += 1
+        if attempts['count'] == 1:
+            raise ApiError(500)
+        return item
+
+    run_batch(['abcd'], fails_once, rate_limiter=CountingLimiter(), token_estimator=len,
+              sleep=lambda seconds: None)
+    assert estimated == [4, 4]
@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import candidate_row, spread_scores
+from dedup import (
+    PLACEHOLDER_NAME,
+    PLACEHOLDER_PRONOUN,
+    group_by_profile,
+    personalize,
+    placeholder_candidate,
+    profile_key,
+)
+from knowledge_base import CORE_COMPETENCIES, OVERALL
+
+SHARED = f"{PLACEHOLDER_NAME} shows promise. He leads his team and they follow him. HIS focus is on himself less."
+
+
+def test_personalize_keeps_he_his_for_male_members():
+    assert personalize(SHARED, {'name': "Omar", 'pronoun': "He/His"}) == SHARED.replace(PLACEHOLDER_NAME, "Omar")
+
+
+def test_personalize_rewrites_pronouns_for_female_members():
+    assert personalize(SHARED, {'name': "Ayesha", 'pronoun': "She/Her"}) == (
+        "Ayesha shows promise. She leads her team and they follow her. HER focus is on herself less."
+    )
+
+
+def test_personalize_leaves_words_containing_pronouns_alone():
+    summary = f"{PLACEHOLDER_NAME} is thorough; he shows this in the chemistry lab."
+    assert personalize(summary, {'name': "Mia", 'pronoun': "She/Her"}) == (
+        "Mia is thorough; she shows this in the chemistry lab."
+    )
+
+
+def test_personalize_needs_the_placeholder():
+    with pytest.raises(ValueError):
+        personalize("He leads his team.", {'name': "Mia", 'pronoun': "She/Her"})
+
+
+def test_placeholder_candidate_keeps_the_profile(candidate):
+    placeholder = placeholder_candidate(candidate)
+    assert placeholder['name'] == PLACEHOLDER_NAME
+    assert placeholder['pronoun'] == PLACEHOLDER_PRONOUN
+    assert profile_key(placeholder) == profile_key(candidate)
+
+
+def test_members_with_the_same_tiers_share_a_profile(prepare):
+    batch = prepare(
+        candidate_row(name="A", gender='M', scores=spread_scores()),
+        candidate_row(name="B", gender='F', scores={**spread_scores(), OVERALL: 2.0}),  # still Low
+        candidate_row(name="C", scores={**spread_scores(), OVERALL: 4.0}),  # High
+        candidate_row(name="D", assessment_type='Shape', scores=spread_scores()),
+    )
+    assert group_by_profile(batch.candidates, range(4)) == [[0, 1]]
+
+
+def test_different_ties_are_different_profiles(prepare):
+    # Same tiers and picks, but only the second candidate has a third competency tied with its second strength
+    first = dict(zip(CORE_COMPETENCIES, [4.5, 4.0, 3.9, 2.0, 1.0, 1.5]))
+    second = dict(zip(CORE_COMPETENCIES, [4.5, 4.0, 4.0, 2.0, 1.0, 1.5]))
+    batch = prepare(candidate_row(scores=first), candidate_row(scores=second))
+    one, two = batch.candidates
+    assert one['strengths'] == two['strengths'] and one['tiers'] == two['tiers']
+    assert profile_key(one) != profile_key(two)
+    assert group_by_profile(batch.candidates, range(2)) == []
@@ -0,0 +1,86 @@
+import datetime
+
+from gemini_client import GeminiSession, MockBackend, generate_summary_for_candidate
+from knowledge_base import DEFINITIVE_PROMPT, SLIM_STATIC_PREFIX
+
+MOCK_SUMMARY = "Mock executive summary."
+
+
+def test_session_caches_a_prefix_once_and_deletes_it_on_close():
+    backend = MockBackend()
+    with GeminiSession(backend=backend) as session:
+        session.generate(DEFINITIVE_PROMPT, "first")
+        session.generate(DEFINITIVE_PROMPT, "second")
+    assert backend.caches == [DEFINITIVE_PROMPT]
+    assert backend.deleted_caches == [DEFINITIVE_PROMPT]
+    # The cached prefix is not sent again
+    assert backend.calls == ["first", "second"]
+
+
+def test_session_only_caches_prefixes_the_model_accepts():
+    backend = MockBackend()
+    with GeminiSession(backend=backend) as session:
+        session.generate(SLIM_STATIC_PREFIX, "delta")
+        session.generate(DEFINITIVE_PROMPT, "delta")
+    assert backend.caches == [DEFINITIVE_PROMPT]
+    assert backend.calls == [SLIM_STATIC_PREFIX + "delta", "delta"]
+
+
+def test_session_sends_the_whole_prompt_when_caching_is_unavailable():
+    backend = MockBackend(supports_caching=False)
+    with GeminiSession(backend=backend) as session:
+        session.generate(DEFINITIVE_PROMPT, "delta")
+    with GeminiSession(backend=backend, use_context_cache=False) as session:
+        session.generate(DEFINITIVE_PROMPT, "delta")
+    assert backend.caches == []
+    assert backend.calls == [DEFINITIVE_PROMPT + "delta"] * 2
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_session_extends_a_cache_before_it_expires():
+    backend = MockBackend()
+    clock = Clock()
+    with GeminiSession(backend=backend, cache_ttl=datetime.timedelta(hours=1), clock=clock) as session:
+        session.generate(DEFINITIVE_PROMPT, "first")
+        clock.now = 1799.0
+        session.generate(DEFINITIVE_PROMPT, "second")
+        assert backend.refreshed_caches == []
+        clock.now = 1800.0
+        session.generate(DEFINITIVE_PROMPT, "third")
+        assert backend.refreshed_caches == [DEFINITIVE_PROMPT]
+        clock.now = 3599.0
+        session.generate(DEFINITIVE_PROMPT, "fourth")
+    assert backend.refreshed_caches == [DEFINITIVE_PROMPT]
+    assert backend.caches == [DEFINITIVE_PROMPT]
+
+
+def test_session_registers_a_prefix_again_when_its_cache_is_gone():
+    class ExpiringBackend(MockBackend):
+        def refresh_cache(self, handle, ttl):
+            raise LookupError("404 CachedContent not found")
+
+    backend = ExpiringBackend()
+    clock = Clock()
+    with GeminiSession(backend=backend, clock=clock) as session:
+        session.generate(DEFINITIVE_PROMPT, "first")
+        clock.now = 7200.0
+        session.generate(DEFINITIVE_PROMPT, "second")
+    assert backend.caches == [DEFINITIVE_PROMPT] * 2
+    assert backend.calls == ["first", "second"]
+
+
+def test_streamed_summary_reports_text_as_it_arrives(candidate):
+    seen = []
+    usage = []
+    with GeminiSession(backend=MockBackend()) as session:
+        summary = generate_summary_for_candidate(session, candidate, on_text=seen.append, on_usage=usage.append)
+    assert summary.startswith(MOCK_SUMMARY)
+    assert len(seen) > 1 and seen[-1] == summary
+    assert len(usage) == 1 and usage[0].candidates_token_count > 0
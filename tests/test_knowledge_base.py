@@ -0,0 +1,41 @@
+import hashlib
+
+from conftest import candidate_row
+from gemini_client import GeminiSession, MockBackend, generate_summary_for_candidate
+from knowledge_base import (
+    CORE_COMPETENCIES,
+    DEFINITIVE_PROMPT,
+    PROMPT_TEMPLATE_VERSION,
+    build_prompt_parts,
+    select_interpretations,
+)
+from packing import build_packed_prompt_parts
+
+# The code-built prompt text recorded for the current PROMPT_TEMPLATE_VERSION. When
+# the test fails after editing that text, bump the version and record the new hash.
+TEMPLATE_FINGERPRINT = (1, '6b263d0d82550207')
+
+
+def template_text(prompt, candidate):
+    """The lines of `prompt` built in code: DEFINITIVE_PROMPT lines and interpretation texts are left out."""
+    for _, _, text in select_interpretations(candidate):
+        prompt = prompt.replace(text, "<interpretation>")
+    definitive_lines = set(DEFINITIVE_PROMPT.splitlines())
+    return "\n".join(line for line in prompt.splitlines() if line not in definitive_lines)
+
+
+def test_code_built_prompt_text_is_versioned(prepare):
+    # A tie for the second strength, so the Rule 3.4 tie wording is included
+    scores = dict(zip(CORE_COMPETENCIES, [4.5, 4.0, 4.0, 2.0, 1.0, 1.5]))
+    candidate = prepare(candidate_row(scores=scores)).candidates[0]
+    backend = MockBackend()
+    with GeminiSession(backend=backend) as session:
+        generate_summary_for_candidate(session, candidate, feedback=["Mentions a number or score"])
+    prompts = [
+        build_prompt_parts(candidate)[1],
+        build_packed_prompt_parts([candidate, candidate])[1],
+        backend.calls[0],
+    ]
+    text = "\n".join(template_text(prompt, candidate) for prompt in prompts)
+    fingerprint = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    assert (PROMPT_TEMPLATE_VERSION, fingerprint) == TEMPLATE_FINGERPRINT
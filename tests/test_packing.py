@@ -0,0 +1,90 @@
+import json
+
+from conftest import candidate_row, spread_scores
+from gemini_client import GeminiSession, MockBackend
+from knowledge_base import SLIM_STATIC_PREFIX
+from packing import (
+    MAX_PACK_SIZE,
+    build_packed_prompt_parts,
+    candidate_id,
+    generate_packed_summaries,
+    make_packs,
+    parse_packed_response,
+    render_summary,
+)
+
+
+def entry(cid, paragraph="A summary.", strengths=("One.", "Two."), development=("Three.", "Four.")):
+    return {'id': cid, 'paragraph': paragraph, 'strengths': list(strengths), 'development_areas': list(development)}
+
+
+def test_parse_splits_entries_by_id():
+    text = json.dumps([entry('C2', paragraph="Second."), entry('C1', paragraph="First.")])
+    parsed = parse_packed_response(text, ['C1', 'C2'])
+    assert parsed == {
+        'C1': render_summary("First.", ["One.", "Two."], ["Three.", "Four."]),
+        'C2': render_summary("Second.", ["One.", "Two."], ["Three.", "Four."]),
+    }
+
+
+def test_parse_tolerates_a_code_fence():
+    text = "```json\n" + json.dumps([entry('C1')]) + "\n```"
+    assert list(parse_packed_response(text, ['C1'])) == ['C1']
+
+
+def test_parse_leaves_out_missing_malformed_and_unknown_ids():
+    text = json.dumps([
+        entry('C1'),
+        entry('C2', strengths=["Only one."]),
+        entry('C3', paragraph="  "),
+        {'id': 'C4', 'paragraph': "No bullets."},
+        entry('C9'),
+        "not an object",
+    ])
+    assert list(parse_packed_response(text, ['C1', 'C2', 'C3', 'C4', 'C5'])) == ['C1']
+
+
+def test_parse_drops_duplicated_ids():
+    text = json.dumps([entry('C1'), entry('C1', paragraph="Again."), entry('C2')])
+    assert list(parse_packed_response(text, ['C1', 'C2'])) == ['C2']
+
+
+def test_parse_rejects_anything_but_a_json_array():
+    assert parse_packed_response("Here are the summaries:", ['C1']) == {}
+    assert parse_packed_response(json.dumps(entry('C1')), ['C1']) == {}
+    assert parse_packed_response(None, ['C1']) == {}
+
+
+def test_make_packs_caps_the_pack_size():
+    assert make_packs(range(7), 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert len(make_packs(range(100), 1000)[0]) == MAX_PACK_SIZE
+
+
+def test_slim_packed_prompt_carries_each_candidates_bullet_picks(prepare):
+    batch = prepare(
+        candidate_row(name="Ann", scores=spread_scores()),
+        candidate_row(name="Bob", assessment_type='Shape', scores=spread_scores(start=4.3, step=-0.4)),
+    )
+    prefix, delta = build_packed_prompt_parts(batch.candidates)
+    assert prefix == SLIM_STATIC_PREFIX
+    assert delta.count("Per Rule 3.4") == 2
+    assert "**Candidate C2 (Assessment Type: Shape)**" in delta
+    assert '"id": "C1", "name": "Ann"' in delta
+
+
+def test_generate_packed_summaries_with_the_mock_backend(prepare):
+    batch = prepare(*(candidate_row(name=f"Candidate {i}") for i in range(3)))
+    backend = MockBackend()
+    usage = []
+    with GeminiSession(backend=backend) as session:
+        summaries = generate_packed_summaries(session, batch.candidates, on_usage=usage.append)
+    assert sorted(summaries) == [0, 1, 2]
+    assert summaries[0].startswith("Mock executive summary.\n**Strengths:**")
+    assert len(backend.calls) == 1 and len(usage) == 1
+
+
+def test_entries_missing_from_the_response_are_left_for_single_mode(prepare):
+    batch = prepare(*(candidate_row(name=f"Candidate {i}") for i in range(3)))
+    backend = MockBackend(responder=lambda prompt: json.dumps([entry(candidate_id(1))]))
+    with GeminiSession(backend=backend) as session:
+        assert list(generate_packed_summaries(session, batch.candidates)) == [1]
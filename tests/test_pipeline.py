@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+import journal as journal_module
+from benchmark import LatencyModel, SimulatedBackend
+from conftest import candidate_row, spread_scores
+from gemini_client import GeminiSession, MockBackend
+from journal import JobJournal, job_id_for
+from pipeline import GenerationOptions, generate_summaries
+from result_cache import ResultCache
+from telemetry import RunMetrics
+
+MOCK_SUMMARY = "Mock executive summary."
+
+
+def simulated():
+    return SimulatedBackend(latency=LatencyModel('constant', 0.0), seed=0)
+
+
+def run(candidates, backend, options, **kwargs):
+    with GeminiSession(backend=backend) as session:
+        return generate_summaries(candidates, session, options, rate_limiter=options.rate_limiter(), **kwargs)
+
+
+@pytest.fixture
+def batch(prepare):
+    return prepare(
+        candidate_row(name="Ann", gender='F', scores=spread_scores()),
+        candidate_row(name="", scores=spread_scores()),
+        candidate_row(name="Cy", assessment_type='Shape', scores=spread_scores(start=4.3, step=-0.4)),
+    )
+
+
+def test_rejected_rows_are_never_sent(batch):
+    backend = MockBackend()
+    seen = []
+    result = run(batch.candidates, backend, GenerationOptions(validate=False), rejected=batch.rejections,
+                 on_summary=lambda index, summary: seen.append(index))
+    assert len(backend.calls) == 2
+    assert result.summaries[0].startswith(MOCK_SUMMARY)
+    assert result.summaries[1] == "Rejected: Name is blank"
+    assert sorted(seen) == [0, 1, 2]
+    assert result.calls == 2 and result.attempts == 2
+
+
+def test_result_cache_serves_unchanged_rows(batch, tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    options = GenerationOptions(validate=False)
+    run(batch.candidates, MockBackend(), options, result_cache=cache, rejected=batch.rejections)
+    backend = MockBackend()
+    result = run(batch.candidates, backend, options, result_cache=cache, rejected=batch.rejections)
+    assert backend.calls == []
+    assert result.cache_hits == 2
+
+
+def test_only_summaries_failing_validation_are_regenerated(batch):
+    # The simulated backend answers with compliant text; the default mock never complies
+    result = run(batch.candidates, simulated(), GenerationOptions(), rejected=batch.rejections)
+    assert result.regenerated == 0
+    assert result.validation_column() == ["Pass", "Not generated", "Pass"]
+
+    backend = MockBackend()
+    result = run(batch.candidates, backend, GenerationOptions(max_regenerations=1), rejected=batch.rejections)
+    assert result.regenerated == 2
+    assert len(backend.calls) == 4
+    assert "Corrections Required" in backend.calls[-1]
+
+
+def test_empty_streamed_response_is_an_error_and_not_cached(batch, tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    backend = MockBackend(responder=lambda prompt: "")
+    result = run(batch.candidates, backend, GenerationOptions(stream=True, validate=False, max_retries=0),
+                 result_cache=cache, rejected=batch.rejections)
+    assert sorted(result.errors) == [0, 2]
+    assert cache.stats()['entries'] == 0
+
+
+def test_packed_mode_falls_back_to_single_requests(prepare):
+    batch = prepare(*(candidate_row(name=f"Candidate {i}") for i in range(4)))
+    packed_answer = json.dumps([{
+        'id': 'C1', 'paragraph': "Packed.", 'strengths': ["One.", "Two."], 'development_areas': ["Three.", "Four."],
+    }])
+
+    def responder(prompt):
+        return packed_answer if "BATCH OUTPUT FORMAT" in prompt else MOCK_SUMMARY
+
+    backend = MockBackend(responder=responder)
+    result = run(batch.candidates, backend, GenerationOptions(packed=True, pack_size=4, validate=False))
+    assert result.summaries[0].startswith("Packed.")
+    assert result.summaries[1:] == [MOCK_SUMMARY] * 3
+    assert len(backend.calls) == 4 and result.calls == 4
+
+
+def test_dedup_counts_one_call_per_shared_generation(prepare):
+    rows = [candidate_row(name=f"Member {i}", gender='MF'[i % 2], scores=spread_scores()) for i in range(4)]
+    batch = prepare(*rows, candidate_row(name="Solo", assessment_type='Shape', scores=spread_scores()))
+    backend = simulated()
+    options = GenerationOptions(dedup=True)
+    result = run(batch.candidates, backend, options)
+    assert backend.call_count == 2
+    assert (result.deduplicated, result.dedup_groups) == (4, 1)
+    assert result.summaries[1].startswith("Member 1 ")
+    assert result.validation_column() == ["Pass"] * 5
+
+    metrics = RunMetrics(options)
+    metrics.add(result)
+    summary = metrics.summary()
+    assert (summary['calls'], summary['attempts'], summary['failed_attempts']) == (2, 2, 0)
+
+
+def test_journal_resumes_completed_rows_unless_told_not_to(batch, tmp_path):
+    journal = JobJournal(str(tmp_path / 'jobs.sqlite3'))
+    options = GenerationOptions(validate=False)
+    job_id = job_id_for('digest', options)
+    journal.start_job(job_id, ['Name'])
+    journal.add_rows(job_id, [{'Name': c['name'] if c else ""} for c in batch.candidates])
+    kwargs = dict(journal=journal, job_id=job_id, rejected=batch.rejections)
+
+    run(batch.candidates, MockBackend(), options, **kwargs)
+    backend = MockBackend()
+    assert run(batch.candidates, backend, options, **kwargs).resumed == 2
+    assert backend.calls == []
+
+    backend = MockBackend()
+    assert run(batch.candidates, backend, options, resume=False, **kwargs).resumed == 0
+    assert len(backend.calls) == 2
+
+
+def test_job_id_changes_with_the_prompt_version(monkeypatch):
+    options = GenerationOptions()
+    before = job_id_for('digest', options)
+    monkeypatch.setattr(journal_module, 'PROMPT_VERSION', 'edited')
+    assert job_id_for('digest', options) != before
+
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from conftest import candidate_row, spread_scores
+from knowledge_base import CORE_COMPETENCIES, OVERALL, REASONING
+from preprocess import FLAGGED, REJECTED, prepare_candidates, rank_competencies, score_tiers
+
+
+def test_valid_rows_get_precomputed_records(prepare):
+    batch = prepare(candidate_row(name=" Ayesha ", gender='f', assessment_type='shape', scores=spread_scores()))
+    record, = batch.candidates
+    assert batch.accepted == [0]
+    assert batch.issues.empty
+    assert record['name'] == "Ayesha"
+    assert record['pronoun'] == "She/Her"
+    assert record['assessment_type'] == 'Shape'
+    assert record['tiers'][OVERALL] == 'Low'
+    assert record['tiers']['Change Potential'] == 'High'
+    # Core competency scores rise in template order
+    assert record['strengths'] == ['Change Potential', 'Execution Potential']
+    assert record['development_areas'] == ['Drive Potential', 'Learning Potential']
+    assert record['strength_ties'] == [] and record['development_ties'] == []
+
+
+def test_invalid_rows_are_rejected_with_every_reason(prepare):
+    batch = prepare(
+        candidate_row(),
+        candidate_row(name="", scores={OVERALL: 7.5}),
+        candidate_row(assessment_type='Lead'),
+        candidate_row(scores={REASONING: 'n/a'}),
+        candidate_row(gender=None),
+    )
+    assert batch.accepted == [0]
+    assert batch.candidates[1:] == [None] * 4
+    assert batch.rejections[1] == f"Name is blank; {OVERALL} 7.5 is outside 1.0-5.0"
+    assert batch.rejections[2] == "Type 'Lead' is not one of Apply, Shape"
+    assert batch.rejections[3] == f"{REASONING} 'n/a' is not a number"
+    assert batch.rejections[4] == "Gender is blank"
+    # Spreadsheet row numbers: the header is row 1
+    assert batch.issues['Row'].tolist() == [3, 3, 4, 5, 6]
+    assert set(batch.issues['Severity']) == {REJECTED}
+
+
+def test_unknown_gender_is_flagged_but_kept(prepare):
+    batch = prepare(candidate_row(gender='X'))
+    assert batch.accepted == [0]
+    assert batch.flagged == 1
+    assert batch.issues['Severity'].tolist() == [FLAGGED]
+    assert batch.candidates[0]['pronoun'] == "He/His"
+
+
+def test_row_offset_shifts_reported_row_numbers():
+    batch = prepare_candidates(pd.DataFrame([candidate_row(name="")]), row_offset=500)
+    assert batch.issues['Row'].tolist() == [502]
+
+
+def test_score_tiers_use_the_part_3_4_cutoffs():
+    assert score_tiers(np.array([1.0, 2.49, 2.5, 3.49, 3.5, 5.0])).tolist() == [
+        'Low', 'Low', 'Moderate', 'Moderate', 'High', 'High',
+    ]
+
+
+def test_rank_competencies_keeps_picks_distinct_when_all_scores_are_level():
+    top, bottom, top_ties, bottom_ties = rank_competencies(np.full((1, len(CORE_COMPETENCIES)), 3.0))
+    # Strengths prefer earlier competencies, development areas later ones
+    assert top[0].tolist() == [0, 1]
+    assert bottom[0].tolist() == [5, 4]
+    assert not set(top[0]) & set(bottom[0])
+    # Everything not picked on either side is tied with the second pick
+    assert np.flatnonzero(top_ties[0]).tolist() == [2, 3]
+    assert np.flatnonzero(bottom_ties[0]).tolist() == [2, 3]
+
+
+def test_rank_competencies_reports_only_ties_with_the_second_pick():
+    scores = np.array([[4.5, 4.0, 4.0, 2.0, 1.0, 2.0]])
+    top, bottom, top_ties, bottom_ties = rank_competencies(scores)
+    assert top[0].tolist() == [0, 1]
+    assert np.flatnonzero(top_ties[0]).tolist() == [2]
+    assert bottom[0].tolist() == [4, 5]
+    assert np.flatnonzero(bottom_ties[0]).tolist() == [3]
+
+
+def test_tied_competencies_reach_the_candidate_record(prepare):
+    scores = dict(zip(CORE_COMPETENCIES, [4.5, 4.0, 4.0, 2.0, 1.0, 2.0]))
+    record, = prepare(candidate_row(scores=scores)).candidates
+    assert record['strengths'] == [CORE_COMPETENCIES[0], CORE_COMPETENCIES[1]]
+    assert record['strength_ties'] == [CORE_COMPETENCIES[2]]
+    assert record['development_areas'] == [CORE_COMPETENCIES[4], CORE_COMPETENCIES[5]]
+    assert record['development_ties'] == [CORE_COMPETENCIES[3]]
@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+from conftest import candidate_row
+from pipeline import GenerationOptions
+from task_queue import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_REJECTED,
+    TaskQueue,
+    export_job,
+    queue_job_id,
+)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return TaskQueue(str(tmp_path / 'queue.sqlite3'))
+
+
+@pytest.fixture
+def submit(queue, prepare):
+    """Submits a job of `rows` candidate rows; rows listed in `invalid` get a blank name."""
+    def _submit(job_id, rows, invalid=(), options=None):
+        frame = pd.DataFrame([candidate_row(name="" if i in invalid else f"Row {i}") for i in range(rows)])
+        batch = prepare(*frame.to_dict('records'))
+        return queue.submit(job_id, options or GenerationOptions(), frame.columns, frame.to_dict('records'),
+                            batch.candidates, batch.rejections, source=f"{job_id}.xlsx")
+    return _submit
+
+
+def test_submit_is_idempotent_and_stores_rejected_rows(queue, submit):
+    assert submit('job', 4, invalid={2})
+    assert not submit('job', 4)
+    assert queue.progress('job') == {
+        'pending': 3, 'running': 0, 'done': 0, 'failed': 0, 'rejected': 1, 'total': 4,
+    }
+    assert queue.options('job')['validate'] is True
+
+
+def test_claim_takes_rows_round_robin_across_jobs(queue, submit):
+    submit('big', 5)
+    submit('small', 2)
+    claimed = queue.claim('w1', limit=4)
+    assert [(task['job_id'], task['row_index']) for task in claimed] == [
+        ('big', 0), ('small', 0), ('big', 1), ('small', 1),
+    ]
+    assert claimed[0]['candidate']['name'] == "Row 0"
+    assert queue.progress('big')['running'] == 2
+    # Claimed tasks are leased to w1 and not handed out again
+    assert [(task['job_id'], task['row_index']) for task in queue.claim('w2', limit=10)] == [
+        ('big', 2), ('big', 3), ('big', 4),
+    ]
+    assert queue.claim('w3') == []
+
+
+def test_claim_skips_rejected_rows(queue, submit):
+    submit('job', 3, invalid={0})
+    assert [task['row_index'] for task in queue.claim('w1')] == [1, 2]
+
+
+def test_expired_leases_pass_to_another_worker(queue, submit):
+    submit('job', 2)
+    queue.claim('w1', lease=-1)  # already expired
+    claimed = queue.claim('w2')
+    assert [task['row_index'] for task in claimed] == [0, 1]
+    # The first worker's late result is ignored; the new leaseholder's is kept
+    assert not queue.complete('w1', 'job', 0, "late")
+    assert queue.complete('w2', 'job', 0, "on time")
+    assert [summary for _, _, _, summary, _ in queue.iter_results('job')][0] == "on time"
+
+
+def test_heartbeat_keeps_the_lease(queue, submit):
+    submit('job', 1)
+    queue.claim('w1', lease=-1)
+    queue.heartbeat('w1')
+    assert queue.claim('w2') == []
+
+
+def test_complete_records_results_and_failures(queue, submit, tmp_path):
+    submit('job', 3, invalid={2})
+    queue.claim('w1')
+    assert queue.complete('w1', 'job', 0, "Summary 0", result={'Validation': "Pass"})
+    assert queue.complete('w1', 'job', 1, "Error: quota", error=RuntimeError("quota"))
+    # Only a running task can be completed, and only once
+    assert not queue.complete('w1', 'job', 0, "again")
+    assert queue.is_finished('job')
+
+    results = list(queue.iter_results('job'))
+    assert [status for _, _, status, _, _ in results] == [STATUS_DONE, STATUS_FAILED, STATUS_REJECTED]
+    assert results[2][3] == "Rejected: Name is blank"
+
+    output = tmp_path / 'results.xlsx'
+    assert export_job(queue, 'job', str(output), 'Summary', ['Validation']) == 3
+    written = pd.read_excel(output)
+    assert written['Summary'].tolist() == ["Summary 0", "Error: quota", "Rejected: Name is blank"]
+    assert written['Validation'].tolist()[0] == "Pass"
+
+
+def test_retry_failed_and_release_requeue_tasks(queue, submit):
+    submit('job', 2)
+    queue.claim('w1')
+    queue.complete('w1', 'job', 0, "Error", error=RuntimeError("boom"))
+    assert queue.release('w1') == 1
+    assert queue.retry_failed('job') == 1
+    assert queue.progress('job')['pending'] == 2
+
+
+def test_queue_refuses_to_open_on_another_host(tmp_path):
+    path = str(tmp_path / 'queue.sqlite3')
+    TaskQueue(path, host='first')
+    TaskQueue(path, host='first')
+    with pytest.raises(RuntimeError, match="belongs to host 'first'"):
+        TaskQueue(path, host='second')
+
+
+def test_queue_job_id_covers_options_that_change_results():
+    options = GenerationOptions()
+    assert queue_job_id('digest', options) == queue_job_id('digest', GenerationOptions())
+    assert queue_job_id('digest', options) != queue_job_id('other', options)
+    for changed in (
+        GenerationOptions(validate=False), GenerationOptions(packed=True), GenerationOptions(dedup=True),
+        GenerationOptions(stream=True), GenerationOptions(max_regenerations=0),
+        GenerationOptions(use_result_cache=False),
+    ):
+        assert queue_job_id('digest', changed) != queue_job_id('digest', options)
+    for throughput in (
+        GenerationOptions(max_workers=2), GenerationOptions(rpm=10), GenerationOptions(tpm=1000),
+        GenerationOptions(max_retries=0), GenerationOptions(use_context_cache=False),
+    ):
+        assert queue_job_id('digest', throughput) == queue_job_id('digest', options)
@@ -0,0 +1,71 @@
+import pytest
+
+from benchmark import compliant_parts
+from conftest import candidate_row, spread_scores
+from packing import render_summary
+from validator import MAX_PARAGRAPH_WORDS, format_validation, split_summary, validate_summary
+
+
+@pytest.fixture
+def parts(candidate):
+    return compliant_parts(candidate)
+
+
+def test_compliant_summary_passes(candidate, parts):
+    assert validate_summary(render_summary(*parts), candidate) == []
+    assert format_validation([]) == "Pass"
+
+
+def test_split_summary_finds_paragraph_and_bullets(parts):
+    paragraph, strengths, development = split_summary(render_summary(*parts))
+    assert paragraph == parts[0]
+    assert strengths == parts[1]
+    assert development == parts[2]
+
+
+def test_missing_sections_fail(candidate, parts):
+    assert validate_summary("", candidate) == ["Summary is empty"]
+    assert validate_summary(parts[0], candidate) == ["Missing 'Strengths' or 'Development Areas' section"]
+
+
+def test_bullet_counts_are_checked(candidate, parts):
+    paragraph, strengths, development = parts
+    reasons = validate_summary(render_summary(paragraph, strengths[:1], development + ["A third area."]), candidate)
+    assert "Has 1 strengths (expected 2)" in reasons
+    assert "Has 3 development areas (expected 2)" in reasons
+
+
+def test_numbers_and_competency_names_fail(candidate, parts):
+    paragraph, strengths, development = parts
+    strengths = ["Scored 4.3 overall.", "Shows strong Change Potential."]
+    reasons = validate_summary(render_summary(paragraph, strengths, development), candidate)
+    assert "Mentions a number or score" in reasons
+    assert "Names a competency: Change Potential" in reasons
+
+
+def test_digits_in_the_candidate_name_are_allowed(prepare):
+    candidate = prepare(candidate_row(name="Agent 47", scores=spread_scores())).candidates[0]
+    paragraph, strengths, development = compliant_parts(candidate)
+    assert validate_summary(render_summary(paragraph, strengths, development), candidate) == []
+
+
+def test_opening_must_be_verbatim(candidate, parts):
+    paragraph, strengths, development = parts
+    reworded = paragraph.replace("potential", "promise", 1)
+    reasons = validate_summary(render_summary(reworded, strengths, development), candidate)
+    assert any(reason.startswith("Opening statement is not the verbatim") for reason in reasons)
+
+
+def test_long_paragraph_fails(candidate, parts):
+    paragraph, strengths, development = parts
+    padded = paragraph + " Further detail follows." * MAX_PARAGRAPH_WORDS
+    reasons = validate_summary(render_summary(padded, strengths, development), candidate)
+    assert any(reason.startswith("Paragraph is") for reason in reasons)
+
+
+def test_bullet_repeating_the_paragraph_fails(candidate, parts):
+    paragraph, strengths, development = parts
+    copied = " ".join(paragraph.split(". ")[1].split()[:10])
+    reasons = validate_summary(render_summary(paragraph, [copied, strengths[1]], development), candidate)
+    assert any(reason.startswith("Bullet repeats the paragraph") for reason in reasons)
+    assert format_validation(reasons).startswith("Fail: ")
@@ -0,0 +1,125 @@
+"""
+Local checks of a generated summary against the Part 3 writing rules.
+
+`validate_summary` compares one summary with the knowledge-base rows
+selected for its candidate and returns the rules it breaks. An empty list
+means it passed. The checks are plain string operations, fast enough to run
+on every row, so only failing candidates need to be sent back to the model.
+"""
+import re
+
+from knowledge_base import OVERALL, REASONING, SCORE_KEYS, select_interpretations
+
+MAX_PARAGRAPH_WORDS = 200
+REQUIRED_BULLETS = 2
+
+# A competency counts as covered when one run of this many consecutive words
+# from its interpretation text appears in the paragraph. The rules allow
+# sentences to be sequenced and joined, not rewritten.
+COVERAGE_PHRASE_WORDS = 4
+# A bullet repeats the paragraph when it shares a run of this many words with it.
+REPETITION_PHRASE_WORDS = 8
+
+STRENGTHS_HEADING = re.compile(r'\*\*\s*Strengths\s*:?\s*\*\*:?', re.IGNORECASE)
+DEVELOPMENT_HEADING = re.compile(r'\*\*\s*Development Areas\s*:?\s*\*\*:?', re.IGNORECASE)
+BULLET = re.compile(r'^\s*(?:[*\-•]|\d+[.)])\s+(.*\S)\s*$')
+WORD = re.compile(r"[a-z]+(?:['’-][a-z]+)*")
+
+
+def _words(text):
+    return WORD.findall(text.lower())
+
+
+def _phrases(words, size):
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def split_summary(summary):
+    """
+    Splits a summary into (paragraph, strengths, development areas).
+
+    Returns None for any part that cannot be found.
+    """
+    strengths_match = STRENGTHS_HEADING.search(summary or '')
+    development_match = DEVELOPMENT_HEADING.search(summary or '')
+    if not strengths_match or not development_match or development_match.start() < strengths_match.end():
+        return (summary or '').strip() or None, None, None
+
+    def bullets(block):
+        return [m.group(1) for m in (BULLET.match(line) for line in block.splitlines()) if m]
+
+    paragraph = summary[:strengths_match.start()].strip()
+    strengths = bullets(summary[strengths_match.end():development_match.start()])
+    development = bullets(summary[development_match.end():])
+    return paragraph or None, strengths, development
+
+
+def _possessive(pronoun):
+    return 'her' if str(pronoun).lower().startswith('she') else 'his'
+
+
+def validate_summary(summary, candidate):
+    """
+    Checks one summary against the Part 3 rules for the candidate's selected rows.
+
+    Args:
+        summary (str): The generated summary text.
+        candidate (dict): {'name', 'pronoun', 'assessment_type', 'scores'}.
+
+    Returns:
+        list[str]: Human-readable reasons the summary fails. Empty if it passes.
+    """
+    paragraph, strengths, development = split_summary(summary)
+    if paragraph is None:
+        return ["Summary is empty"]
+    if strengths is None:
+        return ["Missing 'Strengths' or 'Development Areas' section"]
+
+    reasons = []
+    name = str(candidate['name'])
+    paragraph_words = _words(paragraph.replace(name, ' '))
+
+    if len(paragraph.split()) >= MAX_PARAGRAPH_WORDS:
+        reasons.append(f"Paragraph is {len(paragraph.split())} words (must be under {MAX_PARAGRAPH_WORDS})")
+    if len(strengths) != REQUIRED_BULLETS:
+        reasons.append(f"Has {len(strengths)} strengths (expected {REQUIRED_BULLETS})")
+    if len(development) != REQUIRED_BULLETS:
+        reasons.append(f"Has {len(development)} development areas (expected {REQUIRED_BULLETS})")
+
+    # No numbers anywhere; the candidate's name may legitimately contain digits.
+    body = " ".join([paragraph] + strengths + development).replace(name, ' ')
+    if re.search(r'\d', body):
+        reasons.append("Mentions a number or score")
+
+    lowered = body.lower()
+    named = [key for key in SCORE_KEYS if key.lower() in lowered]
+    if named:
+        reasons.append(f"Names a competency: {', '.join(named)}")
+
+    # Verbatim interpretation text: the opening statements exactly, and every
+    # competency represented by a phrase from its selected row.
+    paragraph_text = " ".join(paragraph_words)
+    paragraph_phrases = _phrases(paragraph_words, COVERAGE_PHRASE_WORDS)
+    for key, tier, text in select_interpretations(candidate):
+        if key == OVERALL:
+            if " ".join(_words(text)) not in paragraph_text:
+                reasons.append(f"Opening statement is not the verbatim {tier} {key} text")
+        elif key == REASONING:
+            expected = " ".join(_words(text.replace('His/Her', _possessive(candidate['pronoun']))))
+            if expected not in paragraph_text:
+                reasons.append(f"Reasoning statement is not the verbatim {tier} {key} text")
+        elif not _phrases(_words(text), COVERAGE_PHRASE_WORDS) & paragraph_phrases:
+            reasons.append(f"Paragraph does not use the {tier} {key} interpretation text")
+
+    # Bullets must add detail rather than repeat the paragraph.
+    repeat_phrases = _phrases(paragraph_words, REPETITION_PHRASE_WORDS)
+    for bullet in strengths + development:
+        words = _words(bullet)
+        if " ".join(words) in paragraph_text or _phrases(words, REPETITION_PHRASE_WORDS) & repeat_phrases:
+            reasons.append(f"Bullet repeats the paragraph: '{bullet.strip()}'")
+    return reasons
+
+
+def format_validation(reasons):
+    """The text written to the validation column of the results sheet."""
+    return "Pass" if not reasons else "Fail: " + "; ".join(reasons)
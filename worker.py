@@ -0,0 +1,157 @@
+"""
+Queue worker: claims row tasks from the local job queue, generates them and posts the results.
+
+Run as many workers as the API quota allows, on the machine that holds the
+queue database (task_queue.py); the queue cannot be shared between hosts,
+so scale out with more workers and --workers there. Each worker claims a small batch of
+tasks at a time and runs them through the same generation core as the app
+and the CLI. Rate limits belong to the API key, not the job, so each worker
+throttles itself with its own --rpm/--tpm budget. With several workers on
+one key, give each a share of the quota. Jobs with tier-profile dedup on
+only share a generation among rows claimed in the same batch, so a larger
+--batch-size shares more.
+
+Example:
+    GOOGLE_API_KEY=... python worker.py --rpm 50 --workers 8
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+from dataclasses import fields
+
+from batch import DEFAULT_MAX_WORKERS, DEFAULT_RPM, DEFAULT_TPM, RateLimiter
+from gemini_client import GeminiSession, MockBackend
+from pipeline import FIRST_TOKEN_COLUMN, VALIDATION_COLUMN, GenerationOptions, generate_summaries
+from result_cache import DEFAULT_CACHE_PATH, ResultCache
+from task_queue import DEFAULT_LEASE, DEFAULT_QUEUE_PATH, TaskQueue
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate executive summaries for tasks in the local job queue.")
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH, help="Queue SQLite file on a local disk, shared with submitters on this host.")
+    parser.add_argument('--api-key', default=os.environ.get('GOOGLE_API_KEY'),
+                        help="Google API key (defaults to $GOOGLE_API_KEY).")
+    parser.add_argument('--worker-id', default=f"{socket.gethostname()}:{os.getpid()}",
+                        help="Name this worker's task leases are recorded under.")
+    parser.add_argument('--batch-size', type=int, default=2 * DEFAULT_MAX_WORKERS, help="Tasks claimed at a time. Dedup groups form within a batch.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent requests.")
+    parser.add_argument('--rpm', type=int, default=DEFAULT_RPM, help="This worker's requests per minute (0 = unlimited).")
+    parser.add_argument('--tpm', type=int, default=DEFAULT_TPM, help="This worker's tokens per minute (0 = unlimited).")
+    parser.add_argument('--poll', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help="Seconds a claimed task stays with this worker without a heartbeat.")
+    parser.add_argument('--exit-when-idle', action='store_true', help="Exit once the queue is empty.")
+    parser.add_argument('--no-result-cache', action='store_true', help="Always call the API.")
+    parser.add_argument('--cache-path', default=DEFAULT_CACHE_PATH, help="Result cache SQLite file.")
+    parser.add_argument('--mock', action='store_true',
+                        help="Use the local mock backend instead of the Gemini API (dry run). "
+                             "The result cache is not used.")
+    return parser
+
+
+def options_from_job(settings, max_workers):
+    """Rebuilds a job's GenerationOptions, ignoring settings this version does not know."""
+    known = {f.name for f in fields(GenerationOptions)}
+    options = GenerationOptions(**{key: value for key, value in settings.items() if key in known})
+    options.max_workers = max_workers
+    return options
+
+
+def run_tasks(queue, worker_id, tasks, session_for, rate_limiter, result_cache, max_workers, lease):
+    """
+    Generates one claimed batch, job by job, and posts every row's result.
+
+    Returns:
+        tuple[int, int]: (rows posted, rows failed).
+    """
+    by_job = {}
+    for task in tasks:
+        by_job.setdefault(task['job_id'], []).append(task)
+
+    posted = failed = 0
+    for job_id, job_tasks in by_job.items():
+        options = options_from_job(job_tasks[0]['options'], max_workers)
+        last_heartbeat = time.monotonic()
+
+        def on_tick():
+            nonlocal last_heartbeat
+            if time.monotonic() - last_heartbeat > lease / 4:
+                queue.heartbeat(worker_id, lease)
+                last_heartbeat = time.monotonic()
+
+        result = generate_summaries(
+            [task['candidate'] for task in job_tasks], session_for(options), options,
+            result_cache=result_cache if options.use_result_cache else None, rate_limiter=rate_limiter,
+            on_tick=on_tick,
+        )
+        validation = result.validation_column()
+        first_token = result.first_token_column()
+        telemetry = result.telemetry_columns(options.model_name)
+        for position, task in enumerate(job_tasks):
+            extra = {VALIDATION_COLUMN: validation[position], FIRST_TOKEN_COLUMN: first_token[position]}
+            extra.update({column: values[position] for column, values in telemetry.items()})
+            if queue.complete(worker_id, job_id, task['row_index'], result.summaries[position],
+                              error=result.errors.get(position), result=extra):
+                posted += 1
+        failed += len(result.errors)
+    return posted, failed
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.api_key and not args.mock:
+        print("error: a Google API key is required (--api-key or $GOOGLE_API_KEY).", file=sys.stderr)
+        return 2
+
+    try:
+        queue = TaskQueue(args.queue)
+    except RuntimeError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+    rate_limiter = RateLimiter(rpm=args.rpm, tpm=args.tpm)
+    result_cache = None
+    # Mock summaries must never be served to real runs from the shared cache
+    if not args.no_result_cache and not args.mock:
+        result_cache = ResultCache(args.cache_path)
+        result_cache.invalidate_stale()
+        result_cache.evict()
+    backend = MockBackend() if args.mock else None
+    sessions = {}
+
+    def session_for(options):
+        # One session per model and caching mode, kept across batches so cached prefixes are reused
+        key = (options.model_name, options.use_context_cache)
+        if key not in sessions:
+            sessions[key] = GeminiSession(args.api_key, model_name=options.model_name,
+                                          use_context_cache=options.use_context_cache, backend=backend)
+        return sessions[key]
+
+    print(f"Worker {args.worker_id} polling {args.queue}", file=sys.stderr)
+    total = 0
+    try:
+        while True:
+            tasks = queue.claim(args.worker_id, max(1, args.batch_size), args.lease)
+            if not tasks:
+                if args.exit_when_idle:
+                    break
+                time.sleep(args.poll)
+                continue
+            posted, failed = run_tasks(
+                queue, args.worker_id, tasks, session_for, rate_limiter, result_cache, args.workers, args.lease
+            )
+            total += posted
+            print(f"Posted {posted} rows ({failed} failed); {total} in total.", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Hand unfinished tasks back rather than waiting for their leases to expire
+        queue.release(args.worker_id)
+        for session in sessions.values():
+            session.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())